@@ -0,0 +1,74 @@
+# bench/bench_boot.py
+# Mini bot startup: the old one-at-a-time loop vs BotManager.boot() (concurrent, per-bot timeout, retry queue).
+# The fake Bot API adds latency to every call, rejects a few tokens (revoked) and stalls one token completely.
+# Usage: python bench/bench_boot.py [--bots 500] [--latency 0.05] [--revoked 5] [--stall 30]
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+sys.path.insert(0, HERE)
+import bot  # noqa: E402
+from fake_telegram import FakeTelegram  # noqa: E402
+
+
+async def run(mode, args):
+    api = FakeTelegram(latency=args.latency)
+    bot.TELEGRAM_API_BASE = await api.start()
+    bot.MAIN_BUILDER_TOKEN = "1:BUILDER"
+    tokens = [f"{400000 + i}:FAKE" for i in range(args.bots)]
+    api.revoked.update(tokens[1:1 + args.revoked])
+    api.slow[tokens[0]] = args.stall   # a token whose getMe hangs
+
+    with tempfile.TemporaryDirectory() as tmp:
+        bot.DB = bot.Database(os.path.join(tmp, "boot.db"))
+        await bot.DB.open()
+        await bot.init_db()
+        for i, t in enumerate(tokens):
+            await bot.create_mini_bot(42, t, f"fake{400000 + i}_bot", f"Bot {i}")
+        bot.CONFIGS.load(await bot.get_all_mini_bots_records())
+        await bot.MANAGER.start()
+
+        t0 = time.perf_counter()
+        if mode == "serial":
+            for cfg in bot.CONFIGS:
+                try:
+                    await bot.MANAGER.start_mini_bot(cfg, register_webhook=False)
+                except Exception:
+                    pass
+            ready = len(bot.MANAGER.registry)
+            print(f"serial  {ready}/{args.bots} ready in {time.perf_counter() - t0:6.2f}s")
+        else:
+            report = await bot.MANAGER.boot(list(bot.CONFIGS))
+            print(f"boot    {report['ready']}/{report['bots']} ready in {report['time_to_ready_s']:6.2f}s "
+                  f"(boot call {report['boot_s']:.2f}s)  "
+                  f"init p50={report['init_p50_ms']:.0f}ms p99={report['init_p99_ms']:.0f}ms  failed={report['failed']}")
+        await bot.MANAGER.stop_all()
+        await bot.DB.close()
+    await api.stop()
+
+
+async def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--bots", type=int, default=500)
+    ap.add_argument("--latency", type=float, default=0.05)
+    ap.add_argument("--revoked", type=int, default=5)
+    ap.add_argument("--stall", type=float, default=30.0, help="seconds the stalled token's getMe takes")
+    ap.add_argument("--skip-serial", action="store_true")
+    args = ap.parse_args()
+    logging.disable(logging.WARNING)
+    print(f"{args.bots} bots, {args.latency * 1000:.0f}ms API latency, {args.revoked} revoked tokens, "
+          f"1 token stalling {args.stall:.0f}s, boot cap {bot.BOOT_CONCURRENCY}, timeout {bot.BOOT_TIMEOUT:.0f}s")
+    if not args.skip_serial:
+        await run("serial", args)
+    await run("boot", args)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,113 @@
+# bench/bench_db_pool.py
+# /start storm against the database layer: per-call aiosqlite.connect (the old helpers) vs the pooled Database.
+# Usage: python bench/bench_db_pool.py [--updates 3000] [--bots 20] [--concurrency 64]
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import aiosqlite
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import bot  # noqa: E402
+
+
+# --- the pre-pool helpers, one connection per call ---
+async def legacy_add_balance(path, scope, owner_key, amount):
+    async with aiosqlite.connect(path) as db:
+        cur = await db.execute("SELECT id, balance FROM balances WHERE scope=? AND owner_key=?", (scope, owner_key))
+        row = await cur.fetchone()
+        if row:
+            await db.execute("UPDATE balances SET balance=? WHERE id=?", (float(row[1]) + amount, row[0]))
+        else:
+            await db.execute("INSERT INTO balances(scope, owner_key, balance) VALUES(?,?,?)", (scope, owner_key, amount))
+        await db.commit()
+
+async def legacy_record_mini_join(path, bot_id, owner_id, user_id, ref_by):
+    async with aiosqlite.connect(path) as db:
+        try:
+            await db.execute("INSERT INTO mini_users(bot_id, user_id, joined_at, ref_by) VALUES(?,?,?,?)",
+                             (bot_id, user_id, datetime.utcnow().isoformat(), ref_by))
+            await db.commit()
+            is_new = True
+        except Exception:
+            is_new = False
+    if is_new:
+        await legacy_add_balance(path, "builder_user", str(owner_id), bot.EARN_PER_USER_NAIRA)
+        async with aiosqlite.connect(path) as db:
+            cur = await db.execute("SELECT referrer_id FROM creators WHERE user_id=?", (owner_id,))
+            row = await cur.fetchone()
+            if row and row[0]:
+                await legacy_add_balance(path, "builder_user", str(row[0]), bot.DOWNLINE_EARN_PER_USER_NAIRA)
+    return is_new
+
+
+async def seed(n_bots):
+    for b in range(1, n_bots + 1):
+        await bot.set_creator_if_new(1000 + b, f"owner{b}", 1 if b % 2 else None)
+        await bot.create_mini_bot(1000 + b, f"{b}:TOKEN", f"bot{b}", f"Bot {b}")
+
+
+async def storm(fn, n_updates, n_bots, concurrency):
+    latencies = []
+    errors = 0
+    # updates in flight at once (the rest wait, like a handler backlog)
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        nonlocal errors
+        b = i % n_bots + 1
+        async with sem:
+            t0 = time.perf_counter()
+            try:
+                await fn(b, 1000 + b, 500000 + i, None)
+            except Exception:
+                # "database is locked" from competing per-call connections
+                errors += 1
+            latencies.append(time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(n_updates)))
+    return time.perf_counter() - t0, latencies, errors
+
+
+def report(name, total, latencies, errors):
+    lat = sorted(latencies)
+    p = lambda q: lat[min(len(lat) - 1, int(q * len(lat)))] * 1000
+    print(f"{name:8s} total={total:7.2f}s  rate={len(lat) / total:8.1f}/s  "
+          f"p50={p(0.50):8.1f}ms  p99={p(0.99):8.1f}ms  errors={errors}")
+
+
+async def run(mode, n_updates, n_bots, concurrency):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        bot.DB = bot.Database(path)
+        await bot.DB.open()
+        await bot.init_db()
+        await seed(n_bots)
+        if mode == "legacy":
+            await bot.DB.close()
+            total, lat, errors = await storm(lambda *a: legacy_record_mini_join(path, *a), n_updates, n_bots, concurrency)
+        else:
+            total, lat, errors = await storm(bot.record_mini_join, n_updates, n_bots, concurrency)
+            await bot.DB.close()
+        report(mode, total, lat, errors)
+
+
+async def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--updates", type=int, default=3000)
+    ap.add_argument("--bots", type=int, default=20)
+    ap.add_argument("--concurrency", type=int, default=64)
+    args = ap.parse_args()
+    print(f"{args.updates} /start updates over {args.bots} bots, {args.concurrency} in flight")
+    await run("legacy", args.updates, args.bots, args.concurrency)
+    await run("pooled", args.updates, args.bots, args.concurrency)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
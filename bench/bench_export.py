@@ -0,0 +1,121 @@
+# bench/bench_export.py
+# /export through ExportRunner against the fake Bot API: rows/s, Python heap peak (tracemalloc) and the worst
+# event-loop stall while the export runs, at two table sizes; memory should not grow with the row count.
+# The old access path (list_mini_user_ids: every id in one list) is measured alongside for comparison.
+# Each upload is decompressed and its rows counted.
+# Usage: python bench/bench_export.py [--users 50000,400000] [--claims 20000] [--fmt csv]
+
+import argparse
+import asyncio
+import gzip
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+sys.path.insert(0, HERE)
+import bot  # noqa: E402
+from fake_telegram import FakeTelegram  # noqa: E402
+
+
+async def seed(users, claims):
+    now = datetime.utcnow().isoformat()
+    bot_id = await bot.create_mini_bot(42, "810000:EXPORT", "export_bot", "Export")
+    other = await bot.create_mini_bot(43, "810001:EXPORT", "other_bot", "Other")
+    async with bot.DB.write() as db:
+        for b in (bot_id, other):
+            for start in range(0, users, 50_000):
+                await db.executemany("INSERT INTO mini_users(bot_id, user_id, joined_at, ref_by) VALUES(?,?,?,?)",
+                                     [(b, 1_000_000 + u, now, None) for u in range(start, min(users, start + 50_000))])
+            for k in range(3):
+                await db.execute("INSERT INTO tasks(bot_id, title, reward, created_at) VALUES(?,?,?,?)",
+                                 (b, f"task {k}", 1.0, now))
+        cur = await db.execute("SELECT id FROM tasks WHERE bot_id=?", (bot_id,))
+        task_ids = [r[0] for r in await cur.fetchall()]
+        await db.executemany(
+            "INSERT INTO task_claims(task_id, user_id, proof, status, created_at) VALUES(?,?,?,?,?)",
+            [(task_ids[i % 3], 1_000_000 + i, "proof, with \"quotes\"", ("pending", "approved", "rejected")[i % 3], now)
+             for i in range(claims)])
+        await db.executemany(
+            "INSERT INTO withdraw_requests(scope, bot_id, requester_id, amount, currency, status, created_at) "
+            "VALUES(?,?,?,?,?,?,?)",
+            [("mini_user", bot_id, 1_000_000 + i, 100.0, "NGN", ("pending", "paid")[i % 2], now) for i in range(claims // 4)])
+    return bot_id
+
+
+async def loop_lag(stop):
+    # worst delay of a 10ms sleep while the export runs
+    worst = 0.0
+    while not stop.is_set():
+        t = time.perf_counter()
+        await asyncio.sleep(0.01)
+        worst = max(worst, time.perf_counter() - t - 0.01)
+    return worst
+
+
+async def run(users, args):
+    api = FakeTelegram()
+    bot.TELEGRAM_API_BASE = await api.start()
+    with tempfile.TemporaryDirectory() as tmp:
+        bot.DB = bot.Database(os.path.join(tmp, "export.db"))
+        await bot.DB.open()
+        await bot.init_db()
+        bot_id = await seed(users, args.claims)
+        tg = bot.ExtBot("810000:EXPORT", base_url=bot.TELEGRAM_API_BASE)
+        await tg.initialize()
+
+        tracemalloc.start()
+        stop = asyncio.Event()
+        lag = asyncio.create_task(loop_lag(stop))
+        t0 = time.perf_counter()
+        assert bot.EXPORTS.submit(tg, 42, bot_id, 42, list(bot.EXPORT_COLUMNS), args.fmt)
+        while bot.EXPORTS._running:
+            await asyncio.sleep(0.01)
+        elapsed = time.perf_counter() - t0
+        stop.set()
+        worst = await lag
+        peak = tracemalloc.get_traced_memory()[1]   # includes the fake API's copy of each upload
+        tracemalloc.stop()
+
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        ids = await bot.list_mini_user_ids(bot_id)
+        old_s, old_peak = time.perf_counter() - t0, tracemalloc.get_traced_memory()[1]
+        del ids
+        tracemalloc.stop()
+
+        counts = {}
+        for _, _, name, data in api.documents:
+            lines = gzip.decompress(data).decode().splitlines()
+            counts[name.split("-", 1)[0]] = len(lines) - (1 if args.fmt == "csv" else 0)
+        size = sum(len(d[3]) for d in api.documents)
+        expected = {"users": users, "claims": args.claims, "withdrawals": args.claims // 4}
+        await tg.shutdown()
+        await bot.DB.close()
+    await api.stop()
+    rows = sum(expected.values())
+    check = "ok" if counts == expected else f"MISMATCH {counts} != {expected}"
+    print(f"users={users:>7}  export {elapsed:6.2f}s  {rows / elapsed:9.0f} rows/s  heap peak {peak / 1e6:6.2f} MB  "
+          f"worst loop stall {worst * 1000:5.1f} ms  {size / 1e6:5.2f} MB gz  {check}")
+    print(f"{'':15}list_mini_user_ids: {old_s:6.2f}s  heap peak {old_peak / 1e6:6.2f} MB")
+
+
+async def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--users", default="50000,400000")
+    ap.add_argument("--claims", type=int, default=20000)
+    ap.add_argument("--fmt", default="csv", choices=("csv", "jsonl"))
+    args = ap.parse_args()
+    logging.disable(logging.WARNING)
+    print(f"chunk {bot.EXPORT_CHUNK} rows, {args.claims} claims, {args.fmt}")
+    for users in (int(u) for u in args.users.split(",")):
+        await run(users, args)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,100 @@
+# bench/bench_join_writer.py
+# Referral-campaign /start burst: record_mini_join with one transaction per join vs the group-commit JoinWriter.
+# Both runs start from the same seed; the final balances and mini_users rows must match.
+# Usage: python bench/bench_join_writer.py [--joins 20000] [--bots 10] [--concurrency 512] [--repeat 0.1]
+#                                          [--synchronous NORMAL|FULL]
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import bot  # noqa: E402
+
+
+async def seed(n_bots):
+    for b in range(1, n_bots + 1):
+        await bot.set_creator_if_new(1000 + b, f"owner{b}", 1 if b % 2 else None)
+        await bot.create_mini_bot(1000 + b, f"{b}:TOKEN", f"bot{b}", f"Bot {b}")
+
+
+def workload(n_joins, n_bots, repeat, seed_value=7):
+    # (bot_id, owner_id, user_id, ref_by); a share of the joins are users pressing /start again
+    rnd = random.Random(seed_value)
+    joins = []
+    for i in range(n_joins):
+        b = i % n_bots + 1
+        user_id = 500000 + (rnd.randrange(max(1, i)) if i and rnd.random() < repeat else i)
+        joins.append((b, 1000 + b, user_id, None))
+    return joins
+
+
+async def run(mode, joins, n_bots, concurrency, synchronous):
+    with tempfile.TemporaryDirectory() as tmp:
+        bot.DB = bot.Database(os.path.join(tmp, "bench.db"))
+        await bot.DB.open()
+        await bot.DB._writer.execute(f"PRAGMA synchronous={synchronous}")
+        await bot.init_db()
+        await seed(n_bots)
+        if mode == "group":
+            bot.JOIN_WRITER = bot.JoinWriter()
+            bot.JOIN_WRITER.start()
+
+        sem = asyncio.Semaphore(concurrency)
+        latencies = []
+        new_users = 0
+
+        async def one(args):
+            nonlocal new_users
+            async with sem:
+                t0 = time.perf_counter()
+                if await bot.record_mini_join(*args):
+                    new_users += 1
+                latencies.append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(one(j) for j in joins))
+        total = time.perf_counter() - t0
+        batches = bot.JOIN_WRITER.batches
+        await bot.JOIN_WRITER.stop()
+
+        async with bot.DB.read() as db:
+            cur = await db.execute("SELECT owner_key, ROUND(balance, 2) FROM balances ORDER BY owner_key")
+            balances = await cur.fetchall()
+            cur = await db.execute("SELECT COUNT(*) FROM mini_users")
+            rows = (await cur.fetchone())[0]
+        await bot.DB.close()
+
+    lat = sorted(latencies)
+    p = lambda q: lat[min(len(lat) - 1, int(q * len(lat)))] * 1000
+    extra = f"  batches={batches}" if mode == "group" else ""
+    print(f"{mode:7s} total={total:7.2f}s  joins/s={len(lat) / total:8.1f}  "
+          f"p50={p(0.50):7.1f}ms  p99={p(0.99):7.1f}ms  new={new_users}{extra}")
+    return balances, rows, new_users
+
+
+async def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--joins", type=int, default=20000)
+    ap.add_argument("--bots", type=int, default=10)
+    ap.add_argument("--concurrency", type=int, default=512)
+    ap.add_argument("--repeat", type=float, default=0.1, help="share of joins from users already joined")
+    ap.add_argument("--synchronous", default="NORMAL")
+    args = ap.parse_args()
+    import logging
+    logging.disable(logging.WARNING)
+
+    joins = workload(args.joins, args.bots, args.repeat)
+    print(f"{args.joins} joins over {args.bots} bots, {args.concurrency} in flight, "
+          f"{args.repeat:.0%} repeats, synchronous={args.synchronous}")
+    single = await run("single", joins, args.bots, args.concurrency, args.synchronous)
+    group = await run("group", joins, args.bots, args.concurrency, args.synchronous)
+    print("state matches" if single == group else "STATE MISMATCH between modes")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,129 @@
+# bench/bench_metrics_overhead.py
+# Cost of the instrumentation layer: the same /start flood through one in-process BotManager with METRICS off and
+# on (handler, per-bot, SQL and API timers all installed), alternating rounds, plus per-call microbenchmarks.
+# The fake Bot API runs in its own process. Prints a sample of the Prometheus output and /perf at the end.
+# Usage: python bench/bench_metrics_overhead.py [--bots 32] [--updates 3000] [--rounds 3]
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import aiohttp
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+sys.path.insert(0, HERE)
+import bot  # noqa: E402
+from bench_shard_scaling import driver, start_fake_api  # noqa: E402
+
+
+async def flood_round(enabled, args, session, base, tokens, round_no):
+    bot.METRICS.enabled = enabled
+    bot.MANAGER = bot.BotManager()
+    with tempfile.TemporaryDirectory() as tmp:
+        bot.DB = bot.Database(os.path.join(tmp, "metrics.db"))
+        await bot.DB.open()
+        await bot.init_db()
+        for i, t in enumerate(tokens):
+            await bot.create_mini_bot(42, t, f"fake{600000 + i}_bot", f"Bot {i}")
+        bot.CONFIGS.load(await bot.get_all_mini_bots_records())
+        await bot.MANAGER.start()
+        await bot.MANAGER.boot(list(bot.CONFIGS))
+        try:
+            start = (await driver(session, base, "stats"))["sent"]
+            t0, cpu0 = time.perf_counter(), time.process_time()
+            # fresh users every round so /start always does the full join bookkeeping
+            await driver(session, base, "flood", tokens=tokens, count=args.updates, text="/start",
+                         user_base=10_000_000 * (round_no + 1) + (5_000_000 if enabled else 0))
+            while (await driver(session, base, "stats"))["sent"] < start + args.updates:
+                await asyncio.sleep(0.02)
+            return args.updates / (time.perf_counter() - t0), (time.process_time() - cpu0) / args.updates * 1e6
+        finally:
+            await bot.MANAGER.stop_all()
+            await bot.DB.close()
+
+
+def micro(n=200_000):
+    m = bot.Metrics(enabled=True)
+    m.histogram("h", "h", ("a",))
+    t0 = time.perf_counter()
+    for i in range(n):
+        m.observe("h", ("x",), 0.003)
+    observe_ns = (time.perf_counter() - t0) / n * 1e9
+    sql = "SELECT balance FROM balances WHERE scope=? AND owner_key=?"
+    t0 = time.perf_counter()
+    for i in range(n):
+        m.sql_label(sql)
+    label_ns = (time.perf_counter() - t0) / n * 1e9
+    return observe_ns, label_ns
+
+
+async def sql_micro(n=5000):
+    # the same point query through a plain and a timed aiosqlite connection
+    out = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for enabled in (False, True):
+            bot.METRICS.enabled = enabled
+            bot.DB = bot.Database(os.path.join(tmp, f"sql{enabled}.db"))
+            await bot.DB.open()
+            await bot.init_db()
+            await bot.add_balance("builder_user", "1", 1.0)
+            t0 = time.perf_counter()
+            for _ in range(n):
+                await bot.get_balance("builder_user", "1")
+            out[enabled] = (time.perf_counter() - t0) / n * 1e6
+            await bot.DB.close()
+    return out
+
+
+async def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--bots", type=int, default=32)
+    ap.add_argument("--updates", type=int, default=3000)
+    ap.add_argument("--rounds", type=int, default=3)
+    args = ap.parse_args()
+    logging.disable(logging.WARNING)
+
+    observe_ns, label_ns = micro()
+    print(f"Metrics.observe: {observe_ns:.0f} ns/call, sql_label (cached): {label_ns:.0f} ns/call")
+    sql = await sql_micro()
+    print(f"get_balance: {sql[False]:.1f} us plain, {sql[True]:.1f} us timed "
+          f"({100 * (sql[True] / sql[False] - 1):+.1f}%)")
+
+    api, base = await start_fake_api()
+    bot.TELEGRAM_API_BASE = base
+    tokens = [f"{600000 + i}:METRICS" for i in range(args.bots)]
+    rates = {False: [], True: []}
+    cpu = {False: [], True: []}   # this process' CPU per update: the fake API's share is not in it
+    try:
+        async with aiohttp.ClientSession() as session:
+            for r in range(args.rounds):
+                for enabled in (False, True) if r % 2 == 0 else (True, False):
+                    rate, cpu_us = await flood_round(enabled, args, session, base, tokens, r)
+                    rates[enabled].append(rate)
+                    cpu[enabled].append(cpu_us)
+    finally:
+        api.terminate()
+        await api.wait()
+
+    off, on = statistics.median(rates[False]), statistics.median(rates[True])
+    cpu_off, cpu_on = statistics.median(cpu[False]), statistics.median(cpu[True])
+    print(f"{args.bots} bots, {args.updates} /start per round, {args.rounds} rounds (median)")
+    print(f"metrics off  {off:8.1f} updates/s  {cpu_off:7.0f} us CPU/update   {[round(x) for x in rates[False]]}")
+    print(f"metrics on   {on:8.1f} updates/s  {cpu_on:7.0f} us CPU/update   {[round(x) for x in rates[True]]}")
+    print(f"overhead     {100 * (1 - on / off):+.1f}% throughput, {100 * (cpu_on / cpu_off - 1):+.1f}% CPU per update")
+
+    print("\n--- /metrics sample ---")
+    text = bot.METRICS.render()
+    print("\n".join(l for l in text.splitlines() if "handler_seconds_count" in l or l.startswith("bot_api_calls"))[:1200])
+    print("\n--- /perf ---")
+    print(bot.format_perf([bot.METRICS.summary()]))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
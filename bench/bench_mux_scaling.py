@@ -0,0 +1,130 @@
+# bench/bench_mux_scaling.py
+# Memory and open sockets per hosted bot: one polling Application per token vs the shared multiplexer,
+# eager or lazy (MUX_LAZY), long polling or webhook delivery.
+# Each (mode, N) runs in a fresh worker process against a fake Bot API running in its own process.
+# Modes: apps, mux, lazy, hook, lazy-hook. --active sends one update to that share of the bots (mux modes)
+# so lazy modes are measured with some bots live.
+# Usage: python bench/bench_mux_scaling.py [--bots 10,100,1000] [--modes apps,mux,lazy] [--active 0.1] [--settle 5]
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+
+
+def rss_kb() -> int:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+def open_sockets() -> int:
+    n = 0
+    for fd in os.listdir("/proc/self/fd"):
+        try:
+            if os.readlink(f"/proc/self/fd/{fd}").startswith("socket:"):
+                n += 1
+        except OSError:
+            pass
+    return n
+
+
+async def worker(mode: str, n_bots: int, base_url: str, settle: float, active: float):
+    import time
+    import bot
+    from telegram import Update
+    from telegram.ext import ApplicationBuilder
+
+    bot.TELEGRAM_API_BASE = base_url
+    bot.MAIN_BUILDER_TOKEN = "1:BUILDER"
+    bot.GLOBAL_REQUIRED_CHANNELS = []
+    bot.MUX_LAZY = mode.startswith("lazy")
+    tokens = [f"{100000 + i}:FAKE" for i in range(n_bots)]
+    rss0, sock0 = rss_kb(), open_sockets()
+
+    apps = []
+    if mode == "apps":
+        # the old per-token Application, plus the updater it would need to actually receive updates
+        for t in tokens:
+            app = ApplicationBuilder().token(t).base_url(base_url).build()
+            await app.initialize()
+            await app.start()
+            await app.updater.start_polling(timeout=10)
+            apps.append(app)
+    else:
+        await bot.MANAGER.start()
+        bot.MANAGER.webhook = mode.endswith("hook")   # updates pushed in, no getUpdates loops
+        for i, t in enumerate(tokens):
+            await bot.MANAGER.start_mini_bot(bot.MiniBotConfig(i + 1, 42, t, f"fake{100000 + i}_bot", f"Bot {i}"),
+                                             register_webhook=False)
+        for i, state in enumerate(list(bot.MANAGER.registry)[:int(n_bots * active)]):
+            upd = {"update_id": 1, "message": {"message_id": 1, "date": int(time.time()), "text": "/help",
+                                               "chat": {"id": 7, "type": "private"},
+                                               "from": {"id": 7 + i, "is_bot": False, "first_name": "u"},
+                                               "entities": [{"type": "bot_command", "offset": 0, "length": 5}]}}
+            await bot.MANAGER._deliver(state, Update.de_json(upd, state.bot))
+    await asyncio.sleep(settle)
+    live = sum(1 for s in bot.MANAGER.registry if s.live) if mode != "apps" else n_bots
+    rss1, sock1 = rss_kb(), open_sockets()
+
+    if mode == "apps":
+        for app in apps:
+            await app.updater.stop()
+            await app.stop()
+            await app.shutdown()
+    else:
+        await bot.MANAGER.stop_all()
+    print(json.dumps({
+        "mode": mode, "bots": n_bots, "live": live,
+        "rss_kb_per_bot": round((rss1 - rss0) / n_bots, 1),
+        "sockets_per_bot": round((sock1 - sock0) / n_bots, 3),
+        "rss_mb_total": round(rss1 / 1024, 1), "sockets_total": sock1,
+    }))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--bots", default="10,100,1000")
+    ap.add_argument("--modes", default="apps,mux")
+    ap.add_argument("--settle", type=float, default=5.0)
+    ap.add_argument("--active", type=float, default=0.0, help="share of bots that receive an update")
+    ap.add_argument("--worker", nargs=3, metavar=("MODE", "N", "BASE_URL"))
+    args = ap.parse_args()
+
+    if args.worker:
+        mode, n, base_url = args.worker
+        import logging
+        logging.disable(logging.WARNING)
+        asyncio.run(worker(mode, int(n), base_url, args.settle, args.active))
+        return
+
+    server = subprocess.Popen([sys.executable, os.path.join(HERE, "fake_telegram.py"), "--port", "0"],
+                              stdout=subprocess.PIPE, text=True)
+    try:
+        base_url = server.stdout.readline().strip().rsplit(" ", 1)[1]
+        print(f"{'mode':9s} {'bots':>5s} {'live':>5s} {'KB/bot':>8s} {'sock/bot':>9s} {'RSS MB':>7s} {'sockets':>8s}")
+        for n in [int(x) for x in args.bots.split(",")]:
+            for mode in args.modes.split(","):
+                out = subprocess.run([sys.executable, __file__, "--settle", str(args.settle), "--active", str(args.active),
+                                      "--worker", mode, str(n), base_url],
+                                     capture_output=True, text=True)
+                lines = [ln for ln in out.stdout.splitlines() if ln.startswith("{")]
+                if not lines:
+                    print(f"{mode:9s} {n:5d} failed: {out.stderr.strip().splitlines()[-1:]}")
+                    continue
+                r = json.loads(lines[-1])
+                print(f"{mode:9s} {n:5d} {r['live']:5d} {r['rss_kb_per_bot']:8.1f} {r['sockets_per_bot']:9.3f} "
+                      f"{r['rss_mb_total']:7.1f} {r['sockets_total']:8d}")
+    finally:
+        server.terminate()
+
+
+if __name__ == "__main__":
+    main()
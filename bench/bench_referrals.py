@@ -0,0 +1,152 @@
+# bench/bench_referrals.py
+# Referral graph: (1) correctness — a random referral forest joined through record_mini_join, once direct and
+# once through the JoinWriter batches, must leave the same closure and counts as rebuild_referrals() computes
+# from mini_users.ref_by, and pay exactly the ref_reward the closure implies; (2) scale — /top, /myrefs and the
+# cost of linking one more join at growing graph sizes (users, closure rows).
+# Usage: python bench/bench_referrals.py [--check-users 3000] [--sizes 10000,100000,1000000] [--samples 300]
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+import bot  # noqa: E402
+
+
+async def open_db(tmp, name):
+    bot.DB = bot.Database(os.path.join(tmp, name))
+    await bot.DB.open()
+    await bot.init_db()
+
+
+async def snapshot():
+    async with bot.DB.read() as db:
+        cur = await db.execute("SELECT graph, descendant, ancestor, depth FROM referral_paths ORDER BY 1, 2, 3")
+        paths = await cur.fetchall()
+        cur = await db.execute("SELECT graph, user_id, direct, total FROM referral_counts ORDER BY 1, 2")
+        counts = await cur.fetchall()
+        cur = await db.execute("SELECT SUM(earned) FROM referral_counts")
+        earned = (await cur.fetchone())[0] or 0.0
+        cur = await db.execute("SELECT SUM(balance) FROM balances WHERE scope='mini_user'")
+        paid = (await cur.fetchone())[0] or 0.0
+    return paths, counts, earned, paid
+
+
+async def check(args, group_commit):
+    rnd = random.Random(7)
+    with tempfile.TemporaryDirectory() as tmp:
+        await open_db(tmp, "check.db")
+        bot.CONFIGS.load([])
+        bot_id = await bot.create_mini_bot(42, "1:CHECK", "check_bot", "Check")
+        await bot.update_mini_setting(bot_id, "ref_reward", 2.0)
+        if group_commit:
+            bot.JOIN_WRITER = bot.JoinWriter()
+            bot.JOIN_WRITER.start()
+        users = [10_000 + i for i in range(args.check_users)]
+        joins = []
+        for i, u in enumerate(users):
+            # mostly earlier users, some unknown, self and later (not yet joined) referrers, some repeat /starts
+            pick = rnd.random()
+            ref = (None if pick < 0.1 else u if pick < 0.13 else 99 if pick < 0.16
+                   else users[min(len(users) - 1, i + rnd.randint(1, 5))] if pick < 0.2
+                   else users[rnd.randrange(max(1, i))] if i else None)
+            joins.append((u, ref))
+            if rnd.random() < 0.05:
+                joins.append((u, users[rnd.randrange(len(users))]))
+        # concurrent bursts, as a /start flood would submit them
+        for k in range(0, len(joins), 200):
+            await asyncio.gather(*(bot.record_mini_join(bot_id, 42, u, r) for u, r in joins[k:k + 200]))
+        if group_commit:
+            await bot.JOIN_WRITER.stop()
+            bot.JOIN_WRITER = bot.JoinWriter()
+        online = await snapshot()
+        async with bot.DB.write() as db:
+            await bot.rebuild_referrals(db)
+        rebuilt = await snapshot()
+        await bot.DB.close()
+    paths, counts, earned, paid = online
+    shares = bot.REF_LEVEL_SHARES[:bot.REFERRAL_DEPTH]
+    expected_pay = sum(2.0 * shares[d - 1] for _, _, _, d in paths if d <= len(shares))
+    ok = paths == rebuilt[0] and counts == rebuilt[1] and abs(paid - expected_pay) < 1e-6 and abs(earned - paid) < 1e-6
+    mode = "JoinWriter" if group_commit else "direct"
+    print(f"check {mode:10}  {len(joins)} /start, {len(paths)} closure rows, {len(counts)} referrers, "
+          f"paid {paid:.2f} (expected {expected_pay:.2f})  {'ok' if ok else 'MISMATCH vs rebuild'}")
+    return ok
+
+
+def ms(samples):
+    samples = sorted(samples)
+    return (f"p50 {statistics.median(samples) * 1000:6.3f} ms  "
+            f"p99 {samples[int(len(samples) * 0.99) - 1] * 1000:6.3f} ms")
+
+
+async def scale(users, args):
+    rnd = random.Random(users)
+    now = datetime.utcnow().isoformat()
+    with tempfile.TemporaryDirectory() as tmp:
+        await open_db(tmp, "scale.db")
+        bot.CONFIGS.load([])
+        bot_id = await bot.create_mini_bot(42, "2:SCALE", "scale_bot", "Scale")
+        await bot.update_mini_setting(bot_id, "ref_reward", 1.0)
+        # preferential attachment: a few big referrers, a long tail
+        refs = [None]
+        t0 = time.perf_counter()
+        async with bot.DB.write() as db:
+            for start in range(0, users, 50_000):
+                rows = []
+                for i in range(start, min(users, start + 50_000)):
+                    ref = None if i == 0 or rnd.random() < 0.2 else refs[rnd.randrange(len(refs))]
+                    refs.append(i)
+                    if ref is not None:
+                        refs.append(ref)
+                    rows.append((bot_id, i, now, ref))
+                await db.executemany("INSERT INTO mini_users(bot_id, user_id, joined_at, ref_by) VALUES(?,?,?,?)", rows)
+            await bot.rebuild_referrals(db)
+            cur = await db.execute("SELECT COUNT(*) FROM referral_paths")
+            closure = (await cur.fetchone())[0]
+        seeded = time.perf_counter() - t0
+
+        top, mine, link = [], [], []
+        for _ in range(args.samples):
+            t = time.perf_counter()
+            await bot.top_referrers(bot_id)
+            top.append(time.perf_counter() - t)
+            t = time.perf_counter()
+            await bot.get_referral_counts(bot_id, rnd.randrange(users))
+            mine.append(time.perf_counter() - t)
+        for n in range(args.samples):
+            t = time.perf_counter()
+            await bot.record_mini_join(bot_id, 42, users + n, rnd.randrange(users))
+            link.append(time.perf_counter() - t)
+        leader = (await bot.top_referrers(bot_id, 1))[0]
+        await bot.DB.close()
+    print(f"users={users:>8}  closure rows {closure:>8}  (seed + backfill {seeded:5.1f}s, top referrer {leader[2]})")
+    print(f"{'':18}/top    {ms(top)}")
+    print(f"{'':18}/myrefs {ms(mine)}")
+    print(f"{'':18}join    {ms(link)}  (insert + link + ref_reward, one commit)")
+
+
+async def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--check-users", type=int, default=3000)
+    ap.add_argument("--sizes", default="10000,100000,1000000")
+    ap.add_argument("--samples", type=int, default=300)
+    args = ap.parse_args()
+    logging.disable(logging.WARNING)
+    print(f"REFERRAL_DEPTH={bot.REFERRAL_DEPTH}  REF_LEVEL_SHARES={bot.REF_LEVEL_SHARES}")
+    ok = all([await check(args, False), await check(args, True)])
+    for users in (int(u) for u in args.sizes.split(",")):
+        await scale(users, args)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
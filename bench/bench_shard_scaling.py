@@ -0,0 +1,118 @@
+# bench/bench_shard_scaling.py
+# Multi-process sharding: the same synthetic update load against ShardSupervisor with 1, 2, 4, ... worker
+# processes. The fake Bot API runs as its own process (so it doesn't share a core with the bench) and is fed
+# over its /_driver routes; a run ends when every update has been answered with a sendMessage.
+# Usage: python bench/bench_shard_scaling.py [--bots 64] [--updates 6000] [--workers 1,2,4] [--text /start]
+#                                            [--kill-one]
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+
+import aiohttp
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+import bot  # noqa: E402
+
+
+async def start_fake_api():
+    proc = await asyncio.create_subprocess_exec(sys.executable, os.path.join(HERE, "fake_telegram.py"), "--port", "0",
+                                                stdout=asyncio.subprocess.PIPE)
+    line = (await proc.stdout.readline()).decode()
+    return proc, line.rsplit(" ", 1)[1].strip()
+
+
+async def driver(session, base, action, **params):
+    async with session.post(base.rsplit("/bot", 1)[0] + f"/_driver/{action}", data=json.dumps(params),
+                            headers={"Content-Type": "application/json"}) as r:
+        return await r.json()
+
+
+async def run(workers, args):
+    api, base = await start_fake_api()
+    bot.TELEGRAM_API_BASE = base
+    tokens = [f"{500000 + i}:SHARD" for i in range(args.bots)]
+    try:
+        async with aiohttp.ClientSession() as session:
+            with tempfile.TemporaryDirectory() as tmp:
+                bot.DB_PATH = os.path.join(tmp, "shard.db")
+                bot.DB = bot.Database(bot.DB_PATH)
+                await bot.DB.open()
+                await bot.init_db()
+                for i, t in enumerate(tokens):
+                    await bot.create_mini_bot(42, t, f"fake{500000 + i}_bot", f"Bot {i}")
+                bot.CONFIGS.load(await bot.get_all_mini_bots_records())
+
+                sup = bot.ShardSupervisor(workers)
+                try:
+                    await sup.start()
+                    while sum(r["hosted"] for r in (await sup.stats()).values()) < args.bots:
+                        await asyncio.sleep(0.1)
+
+                    async def wait_sent(target, stall=None):
+                        # until `target` replies went out, or (kill run) nothing moved for `stall` seconds
+                        last, since = -1, time.perf_counter()
+                        while True:
+                            sent = (await driver(session, base, "stats"))["sent"]
+                            if sent >= target:
+                                return sent
+                            if sent != last:
+                                last, since = sent, time.perf_counter()
+                            elif stall and time.perf_counter() - since > stall:
+                                return sent
+                            await asyncio.sleep(0.05)
+
+                    # warm-up: one update per bot so connection pools and caches are set up everywhere
+                    await driver(session, base, "flood", tokens=tokens, count=args.bots, text="/help", user_base=1)
+                    await wait_sent(args.bots)
+
+                    t0 = time.perf_counter()
+                    await driver(session, base, "flood", tokens=tokens, count=args.updates, text=args.text)
+                    kill = args.kill_one and workers > 1
+                    if kill:
+                        await asyncio.sleep(0.5)
+                        sup._procs[0].kill()
+                    sent = await wait_sent(args.bots + args.updates, stall=5.0 if kill else None)
+                    elapsed = time.perf_counter() - t0 - (5.0 if sent < args.bots + args.updates else 0.0)
+                    lost = args.bots + args.updates - sent
+                    per_shard = await sup.stats()
+                    restarts = sup.restarts
+                finally:
+                    await sup.stop()
+                    await bot.DB.close()
+    finally:
+        api.terminate()
+        await api.wait()
+    hosted = ", ".join(f"{s}:{r['hosted']}" for s, r in sorted(per_shard.items()))
+    return elapsed, hosted, restarts, lost
+
+
+async def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--bots", type=int, default=64)
+    ap.add_argument("--updates", type=int, default=6000)
+    ap.add_argument("--workers", default="1,2,4")
+    ap.add_argument("--text", default="/start")
+    ap.add_argument("--kill-one", action="store_true",
+                    help="kill shard 0 mid-run; its bots move and finish elsewhere (updates it had fetched are lost)")
+    args = ap.parse_args()
+    logging.disable(logging.WARNING)
+
+    print(f"{args.bots} bots, {args.updates} x {args.text!r}, {os.cpu_count()} CPUs")
+    base_rate = None
+    for k in (int(w) for w in args.workers.split(",")):
+        elapsed, hosted, restarts, lost = await run(k, args)
+        rate = args.updates / elapsed
+        base_rate = base_rate or rate
+        print(f"workers={k}  {elapsed:6.2f}s  updates/s={rate:8.1f}  speedup={rate / base_rate:4.2f}x  "
+              f"bots per shard {{{hosted}}}" + (f"  restarts={restarts} lost={lost}" if restarts else ""))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,191 @@
+# bench/bench_tenants.py
+# Database-per-tenant mode: (1) throughput — joins, task claims and claim settlements driven concurrently across
+# N mini bots, once with every bot in one builder.db and once with TENANT_DB_DIR (a file per bot); (2) correctness
+# — the same workload must leave the same balances, users and claim outcomes in both modes, settling a claim twice
+# must debit the owner once, and --split-tenants must move a shared database into tenant files without changing
+# what the bot reads back (stats, balances, counters).
+# Usage: python bench/bench_tenants.py [--bots 1,8,32] [--users 200] [--max-open 16]
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+import bot  # noqa: E402
+
+OWNER = 42
+REWARD = 1.0
+WITHDRAWALS_SQL = "SELECT id, requester_id, amount, status FROM withdraw_requests WHERE bot_id=? ORDER BY id"
+
+
+async def open_db(tmp, tenants, max_open):
+    bot.DB_PATH = os.path.join(tmp, "builder.db")
+    bot.DB = bot.Database(bot.DB_PATH)
+    await bot.DB.open()
+    await bot.init_db()
+    bot.TENANTS = bot.TenantStore(os.path.join(tmp, "tenants"), max_open=max_open) if tenants else None
+    bot.CONFIGS.load([])
+
+
+async def close_db():
+    if bot.TENANTS is not None:
+        await bot.TENANTS.close()
+        bot.TENANTS = None
+    await bot.DB.close()
+
+
+async def create_bots(n):
+    bot_ids = [await bot.create_mini_bot(OWNER, f"{900_000 + i}:TENANT", f"tenant{i}_bot", f"T{i}") for i in range(n)]
+    for b in bot_ids:
+        await bot.create_task(b, "join the channel", REWARD)
+    await bot.add_balance("builder_user", str(OWNER), 10.0 ** 9)
+    return bot_ids
+
+
+async def bot_workload(bot_id, users, lat):
+    # one bot's traffic: every user joins (some referred) and claims the task; the admin settles in pages of 20
+    task_id = (await bot.list_tasks(bot_id))[0][0]
+    for u in range(users):
+        t = time.perf_counter()
+        await bot.record_mini_join(bot_id, OWNER, 1_000 + u, 1_000 + u // 2 if u else None)
+        lat["join"].append(time.perf_counter() - t)
+        t = time.perf_counter()
+        await bot.claim_task(bot_id, task_id, 1_000 + u, "proof")
+        lat["claim"].append(time.perf_counter() - t)
+        if u % 20 == 19:
+            page = await bot.list_pending_claims_page(bot_id, limit=20)
+            ids = [r[0] for r in page]
+            t = time.perf_counter()
+            await bot.settle_claims(bot_id, OWNER, ids, approve=(u // 20) % 4 != 3)
+            lat["settle"].append(time.perf_counter() - t)
+
+
+async def query(bot_id, sql, params=()):
+    async with bot.bot_db(bot_id).read() as db:
+        cur = await db.execute(sql, params)
+        return await cur.fetchall()
+
+
+async def outcome(bot_ids):
+    # what the bot would show: per-bot users, approved/rejected claims, user balances; the owner's balance
+    out = {"owner": round(await bot.get_balance("builder_user", str(OWNER)), 6)}
+    for i, b in enumerate(bot_ids):
+        users = await bot.count_mini_users(b)
+        statuses = await query(b, "SELECT tc.status, COUNT(*) FROM task_claims tc JOIN tasks t ON t.id=tc.task_id "
+                                  "WHERE t.bot_id=? GROUP BY tc.status ORDER BY 1", (b,))
+        paid = sum([await bot.get_balance("mini_user", f"{b}:{1_000 + u}") for u in range(0, 40)])
+        out[i] = (users, statuses, round(paid, 6))
+    return out
+
+
+def ms(samples):
+    samples = sorted(samples)
+    return f"p50 {statistics.median(samples) * 1000:6.2f} ms  p99 {samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1000:7.2f} ms"
+
+
+async def throughput(n, args, tenants):
+    with tempfile.TemporaryDirectory() as tmp:
+        await open_db(tmp, tenants, args.max_open)
+        bot_ids = await create_bots(n)
+        lat = {"join": [], "claim": [], "settle": []}
+        t0 = time.perf_counter()
+        await asyncio.gather(*(bot_workload(b, args.users, lat) for b in bot_ids))
+        elapsed = time.perf_counter() - t0
+        result = await outcome(bot_ids)
+        files = (bot.TENANTS.opened, bot.TENANTS.closed) if tenants else None
+        await close_db()
+    writes = sum(len(v) for v in lat.values())
+    mode = "tenant" if tenants else "shared"
+    extra = f"  files opened/closed {files[0]}/{files[1]}" if files else ""
+    print(f"bots={n:>3} {mode}  {writes / elapsed:7.0f} writes/s  ({elapsed:5.2f}s){extra}")
+    for k, v in lat.items():
+        print(f"{'':13}{k:7}{ms(v)}")
+    return result
+
+
+async def double_settle():
+    # the same claims settled twice, concurrently and again later: one debit each, in both modes
+    ok = True
+    for tenants in (False, True):
+        with tempfile.TemporaryDirectory() as tmp:
+            await open_db(tmp, tenants, 4)
+            bot_id = (await create_bots(1))[0]
+            task_id = (await bot.list_tasks(bot_id))[0][0]
+            for u in range(30):
+                await bot.record_mini_join(bot_id, OWNER, 1_000 + u, None)
+                await bot.claim_task(bot_id, task_id, 1_000 + u, "proof")
+            ids = [r[0] for r in await bot.list_pending_claims_page(bot_id, limit=30)]
+            before = await bot.get_balance("builder_user", str(OWNER))
+            await asyncio.gather(bot.settle_claims(bot_id, OWNER, ids[:20]), bot.settle_claims(bot_id, OWNER, ids[10:]),
+                                 bot.approve_claims_range(bot_id, OWNER, ids[0], ids[-1]))
+            again = await bot.settle_claims(bot_id, OWNER, ids)
+            spent = before - await bot.get_balance("builder_user", str(OWNER))
+            paid = sum([await bot.get_balance("mini_user", f"{bot_id}:{1_000 + u}") for u in range(30)])
+            good = (abs(spent - 30 * REWARD) < 1e-9 and abs(paid - 30 * REWARD) < 1e-9
+                    and all(o == bot.CLAIM_ALREADY_SETTLED for o, _, _ in again.values()))
+            ok &= good
+            print(f"check settle twice ({'tenant' if tenants else 'shared'})  owner debited {spent:.0f}, users paid "
+                  f"{paid:.0f} for 30 claims  {'ok' if good else 'MISMATCH'}")
+            await close_db()
+    return ok
+
+
+async def split_round_trip(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        await open_db(tmp, False, args.max_open)
+        bot_ids = await create_bots(6)
+        await asyncio.gather(*(bot_workload(b, 60, {"join": [], "claim": [], "settle": []}) for b in bot_ids))
+        await bot.record_withdraw_request("mini_user", bot_ids[0], 1_001, 0.5, "NGN", "pending",
+                                          "mini_user", f"{bot_ids[0]}:1001")
+        day = datetime.utcnow().date().isoformat()
+        before = (await outcome(bot_ids), await bot.get_system_stats(day),
+                  [await bot.top_referrers(b) for b in bot_ids], await query(bot_ids[0], WITHDRAWALS_SQL, (bot_ids[0],)))
+        await close_db()
+
+        await bot.split_tenants(os.path.join(tmp, "tenants"))
+        await open_db(tmp, True, args.max_open)
+        async with bot.DB.read() as db:
+            cur = await db.execute("SELECT (SELECT COUNT(*) FROM mini_users) + (SELECT COUNT(*) FROM task_claims)")
+            left = (await cur.fetchone())[0]
+        after = (await outcome(bot_ids), await bot.get_system_stats(day),
+                 [await bot.top_referrers(b) for b in bot_ids], await query(bot_ids[0], WITHDRAWALS_SQL, (bot_ids[0],)))
+        drift = {k: v for k, v in (await bot.rebuild_counters()).items() if v[0] != v[1]}
+        await close_db()
+    ok = before == after and not left and not drift
+    print(f"check --split-tenants  6 bots, {before[1][1]} users moved, {left} rows left in builder.db, "
+          f"counter drift {drift or 'none'}  {'ok' if ok else 'MISMATCH'}")
+    if before != after:
+        print(f"  before {before}\n  after  {after}")
+    return ok
+
+
+async def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--bots", default="1,8,32")
+    ap.add_argument("--users", type=int, default=200)
+    ap.add_argument("--max-open", type=int, default=16)
+    args = ap.parse_args()
+    logging.disable(logging.WARNING)
+    print(f"{args.users} users per bot (join + claim each, settle every 20), TENANT_MAX_OPEN={args.max_open}, "
+          f"{os.cpu_count()} CPU")
+    ok = True
+    for n in (int(b) for b in args.bots.split(",")):
+        shared = await throughput(n, args, False)
+        tenant = await throughput(n, args, True)
+        if shared != tenant:
+            print(f"  MISMATCH: shared and tenant mode disagree for bots={n}")
+            ok = False
+    ok &= await double_settle()
+    ok &= await split_round_trip(args)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,119 @@
+# bench/bench_user_lanes.py
+# Mini bot update scheduling under a running broadcast: the owner sends /broadcast (job over --users recipients,
+# then fanned out by the engine) while new users arrive with /start at a steady --rate. Compares the old
+# one-update-at-a-time-per-bot worker (USER_CONCURRENCY=1, no owner lane) with per-user lanes, reporting /start
+# reply latency. Every processed update is logged to check that no user ever had two updates running at once
+# or out of arrival order. API latency applies to every call (getChatMember, sendMessage, ...).
+# Usage: python bench/bench_user_lanes.py [--users 50000] [--rate 20] [--seconds 10] [--latency 0.05]
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+sys.path.insert(0, HERE)
+import bot  # noqa: E402
+from fake_telegram import FakeTelegram  # noqa: E402
+from suite import fresh_state, percentiles  # noqa: E402
+
+OWNER = 42
+TOKEN = "830000:LANES"
+
+
+def track_order(app, log_):
+    # wraps process_update: (user, update_id, start, end) per update
+    inner = app.process_update
+
+    async def process_update(upd):
+        t0 = time.monotonic()
+        try:
+            await inner(upd)
+        finally:
+            log_.append((upd.effective_user.id, upd.update_id, t0, time.monotonic()))
+    app.process_update = process_update
+
+
+def order_violations(log_):
+    # per user: runs must not overlap and must start in update_id order
+    bad, by_user = 0, {}
+    for user, update_id, t0, t1 in sorted(log_, key=lambda r: r[2]):
+        prev = by_user.get(user)
+        if prev and (update_id < prev[0] or t0 < prev[1]):
+            bad += 1
+        by_user[user] = (update_id, t1)
+    return bad
+
+
+async def run(mode, args):
+    bot.USER_CONCURRENCY, bot.OWNER_LANE_CONCURRENCY = (1, 0) if mode == "serial" else (args.lanes, 4)
+    api = FakeTelegram(latency=args.latency)
+    bot.TELEGRAM_API_BASE = await api.start()
+    bot.MAIN_BUILDER_TOKEN = "1:BUILDER"
+    fresh_state()
+    with tempfile.TemporaryDirectory() as tmp:
+        bot.DB = bot.Database(os.path.join(tmp, "lanes.db"))
+        await bot.DB.open()
+        await bot.init_db()
+        bot_id = await bot.create_mini_bot(OWNER, TOKEN, "fake830000_bot", "Lanes")
+        now = datetime.utcnow().isoformat()
+        async with bot.DB.write() as db:
+            await db.executemany("INSERT INTO mini_users(bot_id, user_id, joined_at) VALUES(?,?,?)",
+                                 [(bot_id, 1_000_000 + u, now) for u in range(args.users)])
+        bot.CONFIGS.load(await bot.get_all_mini_bots_records())
+        await bot.MANAGER.start()
+        await bot.MANAGER.boot(list(bot.CONFIGS))
+        processed = []
+        track_order(bot.MANAGER.app, processed)
+        bot.BROADCASTER.start()
+        try:
+            api.push_update(TOKEN, api.message_update(TOKEN, OWNER, "/broadcast Big news"))
+            # a few users who tap twice in a row, to exercise per-user order
+            for u in range(20):
+                for _ in range(3):
+                    api.push_update(TOKEN, api.message_update(TOKEN, 3_000_000 + u, "/help"))
+            t0 = time.perf_counter()
+            total = int(args.rate * args.seconds)
+            for i in range(total):
+                api.push_update(TOKEN, api.message_update(TOKEN, 2_000_000 + i, "/start"))
+                await asyncio.sleep(max(0.0, t0 + (i + 1) / args.rate - time.perf_counter()))
+            deadline = time.perf_counter() + 120
+            while sum(1 for c in api.reply_chats if c >= 2_000_000 and c < 3_000_000) < total \
+                    and time.perf_counter() < deadline:
+                await asyncio.sleep(0.05)
+            lat = [l for l, c in zip(api.reply_latency, api.reply_chats) if 2_000_000 <= c < 3_000_000]
+            owner = [l for l, c in zip(api.reply_latency, api.reply_chats) if c == OWNER]
+            sent = sum(n for (tok, chat), n in api.deliveries.items() if chat < 2_000_000 and chat != OWNER)
+        finally:
+            await bot.BROADCASTER.stop()
+            await bot.MANAGER.stop_all()
+            await bot.DB.close()
+            await api.stop()
+    p = percentiles(lat)
+    print(f"{mode:7s} /start p50={p['p50']:8.1f}ms p95={p['p95']:8.1f}ms p99={p['p99']:8.1f}ms max={p['max']:8.1f}ms  "
+          f"answered {len(lat)}/{total}  owner /broadcast reply {owner[0] * 1000 if owner else float('nan'):.0f}ms  "
+          f"broadcast sent meanwhile {sent}  order violations {order_violations(processed)}")
+
+
+async def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--users", type=int, default=50000, help="broadcast recipients")
+    ap.add_argument("--rate", type=float, default=20.0, help="/start per second")
+    ap.add_argument("--seconds", type=float, default=10.0)
+    ap.add_argument("--latency", type=float, default=0.05)
+    ap.add_argument("--lanes", type=int, default=bot.USER_CONCURRENCY, help="USER_CONCURRENCY for the lanes run")
+    args = ap.parse_args()
+    logging.disable(logging.WARNING)
+    print(f"1 bot, broadcast to {args.users} users running, {args.rate:.0f} /start/s for {args.seconds:.0f}s, "
+          f"API latency {args.latency * 1000:.0f}ms")
+    for mode in ("serial", "lanes"):
+        await run(mode, args)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,95 @@
+# bench/bench_webhook_load.py
+# Load generator for webhook mode: posts synthetic updates to the local /hook/<bot_id>/<secret> server
+# and measures ingestion (HTTP accept) and end-to-end (reply sent to the fake Bot API) throughput.
+# Usage: python bench/bench_webhook_load.py [--bots 50] [--updates 20000] [--concurrency 200] [--command /help]
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+
+import aiohttp
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+sys.path.insert(0, HERE)
+import bot  # noqa: E402
+from fake_telegram import FakeTelegram  # noqa: E402
+
+
+def pct(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] * 1000 if values else 0.0
+
+
+async def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--bots", type=int, default=50)
+    ap.add_argument("--updates", type=int, default=20000)
+    ap.add_argument("--concurrency", type=int, default=200)
+    ap.add_argument("--command", default="/help")
+    ap.add_argument("--port", type=int, default=18080)
+    args = ap.parse_args()
+    logging.disable(logging.INFO)
+
+    api = FakeTelegram()
+    bot.TELEGRAM_API_BASE = await api.start()
+    bot.MAIN_BUILDER_TOKEN = "1:BUILDER"
+    bot.GLOBAL_REQUIRED_CHANNELS = []
+    bot.WEBHOOK_URL = f"http://127.0.0.1:{args.port}"
+
+    tmp = tempfile.TemporaryDirectory()
+    bot.DB = bot.Database(os.path.join(tmp.name, "bench.db"))
+    await bot.DB.open()
+    await bot.init_db()
+
+    await bot.MANAGER.start()
+    await bot.MANAGER.start_webhook_server("127.0.0.1", args.port)
+    for i in range(args.bots):
+        bot_id = await bot.create_mini_bot(42, f"{200000 + i}:FAKE", f"b{i}", f"Bot {i}")
+        await bot.MANAGER.start_mini_bot(bot.CONFIGS.get(bot_id), register_webhook=False)
+    t0 = time.perf_counter()
+    await bot.MANAGER.register_webhooks()
+    print(f"bulk setWebhook for {args.bots} bots: {time.perf_counter() - t0:.2f}s")
+
+    states = list(bot.MANAGER.registry)
+    urls = [f"{bot.WEBHOOK_URL}/hook/{s.bot_id}/{bot.webhook_secret(s.bot_id, s.bot.token)}" for s in states]
+    sent_before = api.calls["sendMessage"]
+    statuses = {}
+    latencies = []
+    sem = asyncio.Semaphore(args.concurrency)
+
+    async def post(session, i):
+        body = api.message_update("x", 10_000_000 + i, args.command)
+        body["update_id"] = i + 1
+        async with sem:
+            t = time.perf_counter()
+            async with session.post(urls[i % len(urls)], json=body) as resp:
+                statuses[resp.status] = statuses.get(resp.status, 0) + 1
+            latencies.append(time.perf_counter() - t)
+
+    t0 = time.perf_counter()
+    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=args.concurrency)) as session:
+        await asyncio.gather(*(post(session, i) for i in range(args.updates)))
+    t_ingest = time.perf_counter() - t0
+    accepted = statuses.get(200, 0)
+    while api.calls["sendMessage"] - sent_before < accepted and time.perf_counter() - t0 < 300:
+        await asyncio.sleep(0.05)
+    t_done = time.perf_counter() - t0
+
+    print(f"{args.updates} updates over {args.bots} bots, {args.concurrency} in flight, command {args.command}")
+    print(f"statuses: {statuses}")
+    print(f"ingest: {args.updates / t_ingest:8.1f} req/s  p50={pct(latencies, .5):.1f}ms  p99={pct(latencies, .99):.1f}ms")
+    print(f"end-to-end: {accepted / t_done:8.1f} updates/s ({t_done:.2f}s)")
+
+    await bot.MANAGER.stop_all()
+    await bot.DB.close()
+    await api.stop()
+    tmp.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
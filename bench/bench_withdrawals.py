@@ -0,0 +1,176 @@
+# bench/bench_withdrawals.py
+# Withdrawal queues: (1) scale — /withdrawals pages (the real withdrawals_page, keyset next/prev) and page-wide
+# pay/reject settlements at growing amounts of settled history, which the queue has to skip; (2) correctness —
+# overlapping pay-page, reject-page and single settlements racing on one queue must finalize every request
+# exactly once and refund exactly the rejected amounts. Runs on SQLite (one file and database-per-tenant) and,
+# with --dsn, on PostgreSQL in check_storage's scratch schema.
+# Usage: python bench/bench_withdrawals.py [--history 10000,300000] [--pending 2000] [--bots 20] [--dsn DSN]
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+import bot  # noqa: E402
+from check_storage import open_store  # noqa: E402
+
+COLUMNS = ("scope", "bot_id", "requester_id", "amount", "currency", "status", "created_at")
+REQUESTERS = 500
+
+
+async def open_backend(mode, tmp, dsn):
+    st = await open_store("postgres" if mode == "postgres" else "sqlite", tmp, dsn)
+    if mode == "tenant":
+        bot.TENANTS = bot.TenantStore(os.path.join(tmp, f"tenants-{time.monotonic_ns()}"))
+    return st
+
+
+async def seed(st, bot_ids, history, pending):
+    # history settled requests and `pending` waiting ones spread through them, over the bots' queues and the
+    # owner's (every 10th); queue amounts are what the requesters were debited
+    rnd = random.Random(history)
+    now = datetime.utcnow().isoformat()
+    rows = {b: [] for b in [None] + bot_ids}
+    every = max(1, (history + pending) // pending)
+    for i in range(history + pending):
+        b = None if i % 10 == 0 else bot_ids[i // 10 % len(bot_ids)]
+        status = bot.withdraw_queue(b) if i % every == 0 else rnd.choice((bot.WITHDRAW_PAID, bot.WITHDRAW_REJECTED))
+        rows[b].append(("mini_user" if b else "mini_admin_to_owner", b, 10_000 + rnd.randrange(REQUESTERS),
+                        float(rnd.randint(1, 20)), "NGN", status, now))
+    for b, batch in rows.items():
+        if st.name == "postgres":
+            async with st.pool.acquire() as conn:
+                await conn.copy_records_to_table("withdraw_requests", records=batch, columns=COLUMNS)
+        else:
+            async with bot.bot_db(b).write() as db:
+                await db.executemany(f"INSERT INTO withdraw_requests({', '.join(COLUMNS)}) VALUES(?,?,?,?,?,?,?)", batch)
+            async with bot.bot_db(b).write() as db:
+                await db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    if st.name == "postgres":
+        async with st.pool.acquire() as conn:
+            await conn.execute("ANALYZE withdraw_requests")
+
+
+def ms(samples):
+    samples = sorted(samples)
+    return f"p50 {statistics.median(samples) * 1000:6.2f} ms  p99 {samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1000:7.2f} ms"
+
+
+async def timed(lat, key, coro):
+    t = time.perf_counter()
+    result = await coro
+    lat.setdefault(key, []).append(time.perf_counter() - t)
+    return result
+
+
+async def scale(mode, history, args, tmp):
+    st = await open_backend(mode, tmp, args.dsn)
+    bot_ids = [await st.create_mini_bot(42, f"{800_000 + i}:WD", f"wd{i}_bot", f"W{i}") for i in range(args.bots)]
+    t0 = time.perf_counter()
+    await seed(st, bot_ids, history, args.pending)
+    seeded = time.perf_counter() - t0
+    lat = {}
+    walked = 0
+    for b in (bot_ids[0], None):
+        # the whole queue forward a page at a time, then back a few pages
+        after, last = 0, None
+        while True:
+            rows = await timed(lat, "next page", st.list_pending_withdrawals_page(b, after, None, bot.REVIEW_PAGE_SIZE + 1))
+            if not rows:
+                break
+            walked += min(len(rows), bot.REVIEW_PAGE_SIZE)
+            last = rows[min(len(rows), bot.REVIEW_PAGE_SIZE) - 1][0]
+            await timed(lat, "page", bot.withdrawals_page(b, after))
+            after = last
+            if len(rows) <= bot.REVIEW_PAGE_SIZE:
+                break
+        for _ in range(20):
+            page = await timed(lat, "prev page", st.list_pending_withdrawals_page(b, before_id=last, limit=bot.REVIEW_PAGE_SIZE))
+            if not page:
+                break
+            last = page[0][0]
+        # settle the queue page by page, alternating pay and reject
+        n = 0
+        while True:
+            rows = await st.list_pending_withdrawals_page(b, 0, None, bot.REVIEW_PAGE_SIZE)
+            if not rows or n == 40:
+                break
+            approve = n % 2 == 0
+            await timed(lat, "pay page" if approve else "reject page",
+                        st.settle_withdrawals_range(b, rows[0][0], rows[-1][0], approve))
+            n += 1
+    await st.close()
+    print(f"{mode:8} history={history:>7}  {walked} pending walked (seeded in {seeded:4.1f}s)")
+    for k, v in lat.items():
+        print(f"{'':20}{k:12}{ms(v)}  ({len(v)})")
+
+
+async def race(mode, args, tmp):
+    # 60 pending requests of one queue: pay pages, reject pages and single settles all at once, then again
+    st = await open_backend(mode, tmp, args.dsn)
+    b = await st.create_mini_bot(42, "810000:WD", "race_bot", "Race")
+    users = [10_000 + u for u in range(6)]
+    for u in users:
+        await st.add_balance("mini_user", f"{b}:{u}", 1_000.0)
+    for i in range(60):
+        u = users[i % len(users)]
+        assert await st.record_withdraw_request("mini_user", b, u, float(1 + i % 7), "NGN", bot.WITHDRAW_PENDING_ADMIN,
+                                                "mini_user", f"{b}:{u}")
+    before = {u: await st.get_balance("mini_user", f"{b}:{u}") for u in users}
+    ids = [r[0] for r in await st.list_pending_withdrawals_page(b, limit=60)]
+    jobs = []
+    for k in range(0, 60, 5):
+        jobs.append(st.settle_withdrawals_range(b, ids[k], ids[min(59, k + 9)], approve=k % 10 == 0))
+        jobs.append(st.settle_withdrawals(b, ids[k:k + 3] + ids[max(0, k - 4):k], approve=k % 15 != 0))
+    results = await asyncio.gather(*jobs)
+    results.append(await st.settle_withdrawals(b, ids, approve=False))
+    final, refunded = {}, {u: 0.0 for u in users}
+    for result in results:
+        for wid, (outcome, requester, amount, _) in result.items():
+            if outcome in (bot.WITHDRAW_PAID, bot.WITHDRAW_REJECTED):
+                final.setdefault(wid, []).append(outcome)
+                if outcome == bot.WITHDRAW_REJECTED:
+                    refunded[requester] += amount
+    after = {u: await st.get_balance("mini_user", f"{b}:{u}") for u in users}
+    left = await st.list_pending_withdrawals_page(b, limit=60)
+    await st.close()
+    once = sorted(final) == sorted(ids) and all(len(v) == 1 for v in final.values())
+    money = all(abs(after[u] - before[u] - refunded[u]) < 1e-9 for u in users)
+    ok = once and money and not left
+    paid = sum(v == [bot.WITHDRAW_PAID] for v in final.values())
+    print(f"check race ({mode})  {len(ids)} requests, {len(jobs) + 1} settlements: {paid} paid, {len(final) - paid} "
+          f"rejected, refunds {'match' if money else 'MISMATCH'}  {'ok' if ok else 'MISMATCH'}")
+    return ok
+
+
+async def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--history", default="10000,300000")
+    ap.add_argument("--pending", type=int, default=2000)
+    ap.add_argument("--bots", type=int, default=20)
+    ap.add_argument("--dsn", default=os.environ.get("BOT_POSTGRES_DSN", ""))
+    args = ap.parse_args()
+    logging.disable(logging.WARNING)
+    modes = ["shared", "tenant"] + (["postgres"] if args.dsn else [])
+    print(f"REVIEW_PAGE_SIZE={bot.REVIEW_PAGE_SIZE}, {args.pending} pending over {args.bots} bots + the owner queue, "
+          f"{os.cpu_count()} CPU")
+    ok = True
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in modes:
+            ok &= await race(mode, args, tmp)
+        for history in (int(h) for h in args.history.split(",")):
+            for mode in modes:
+                await scale(mode, history, args, tmp)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,174 @@
+# bench/check_query_plans.py
+# Query-plan audit: runs EXPLAIN QUERY PLAN on every SQL statement in bot.py against a freshly migrated schema
+# and exits 1 if any of them does a full SCAN of a table that grows with users, bots or traffic.
+# Statements are the string literals (f-strings included) passed to .execute()/.executemany() or to the
+# SQL-taking helpers in SQL_HELPERS, assigned to a local named `sql`, plus the *_SQL scripts. Intentional scans are listed in ALLOWED_SCANS with the reason.
+# PostgreSQL statements (PostgresStorage, PG_*_SQL) are not SQLite's to plan and are skipped.
+# Usage: python bench/check_query_plans.py [--verbose]
+
+import argparse
+import ast
+import asyncio
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BOT_PY = os.path.join(HERE, "..", "bot.py")
+sys.path.insert(0, os.path.join(HERE, ".."))
+
+# tables bounded by configuration, not by users or traffic
+SMALL_TABLES = {"schema_version", "counters"}
+
+# (function, table) -> why a full scan is expected there
+ALLOWED_SCANS = {
+    ("get_all_mini_bots_records", "mini_bots"): "boot loads every bot",
+    ("list_mini_bot_ids", "mini_bots"): "walks every tenant file (stats, counters, export, split)",
+    ("create_broadcast_job", "mini_users"): "/broadcastall targets every user of every bot",
+    ("COUNTERS_REBUILD_SQL", "mini_bots"): "drift repair recounts everything",
+    ("COUNTERS_REBUILD_SQL", "mini_users"): "drift repair recounts everything",
+    ("COUNTERS_REBUILD_SQL", "task_claims"): "drift repair recounts everything",
+    ("LEDGER_DEDUPE_SQL", "balances"): "one-off migration",
+    ("CLAIMS_UNIQUE_V6_SQL", "task_claims"): "one-off migration",
+    ("REFERRALS_REBUILD_SQL", "c"): "backfill walks every referral link",
+    ("REFERRALS_REBUILD_SQL", "up"): "backfill walks every referral link",
+    ("REFERRALS_REBUILD_SQL", "referral_paths"): "backfill recounts every referral link",
+    ("rebuild_counters", "counters"): "small table",
+}
+
+# stand-ins for f-string fields, by source expression
+FSTRING_FIELDS = {"marks": "?,?,?", "field": "currency", "cols": "*"}
+
+# bot.py functions whose first argument is a statement they run
+SQL_HELPERS = {"_keyset_chunks", "_distinct_statuses"}
+
+# classes whose statements run on PostgreSQL
+POSTGRES_CLASSES = {"PostgresStorage"}
+
+DML = re.compile(r"^\s*(SELECT|INSERT|UPDATE|DELETE|WITH|REPLACE)\b", re.I)
+SCAN = re.compile(r"^SCAN (?!CONSTANT ROW)(?!\d+ CONSTANT ROWS)([A-Za-z_]\w*)")
+
+
+def _literal(node):
+    # SQL text of a str constant or f-string, None for anything else
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    if isinstance(node, ast.JoinedStr):
+        out = []
+        for part in node.values:
+            if isinstance(part, ast.Constant):
+                out.append(part.value)
+            else:
+                src = ast.unparse(part.value)
+                if src not in FSTRING_FIELDS:
+                    return None
+                out.append(FSTRING_FIELDS[src])
+        return "".join(out)
+    return None
+
+
+def collect_statements(path):
+    tree = ast.parse(open(path, encoding="utf-8").read())
+    found = []   # (owner, lineno, sql)
+
+    def owner_of(stack):
+        return stack[-1] if stack else "<module>"
+
+    def visit(node, stack):
+        if isinstance(node, ast.ClassDef) and node.name in POSTGRES_CLASSES:
+            return
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            stack = stack + [node.name]
+        if isinstance(node, ast.Assign) and not stack:
+            for target in node.targets:
+                if isinstance(target, ast.Name) and target.id.endswith("_SQL") and not target.id.startswith("PG_"):
+                    text = _literal(node.value)
+                    if text:
+                        for stmt in split_script(text):
+                            found.append((target.id, node.lineno, stmt))
+        if isinstance(node, ast.Call) and node.args and (
+                isinstance(node.func, ast.Attribute) and node.func.attr in ("execute", "executemany")
+                or isinstance(node.func, ast.Name) and node.func.id in SQL_HELPERS):
+            text = _literal(node.args[0])
+            if text:
+                found.append((owner_of(stack), node.lineno, text))
+        if isinstance(node, ast.Assign) and stack:
+            # sql = "..." and sql, params = "...", (...)
+            for target in node.targets:
+                pairs = [(target, node.value)]
+                if isinstance(target, ast.Tuple) and isinstance(node.value, ast.Tuple):
+                    pairs = list(zip(target.elts, node.value.elts))
+                for name, value in pairs:
+                    if isinstance(name, ast.Name) and name.id == "sql":
+                        text = _literal(value)
+                        if text:
+                            found.append((owner_of(stack), node.lineno, text))
+        for child in ast.iter_child_nodes(node):
+            visit(child, stack)
+
+    visit(tree, [])
+    return [(o, ln, sql) for o, ln, sql in found if DML.match(sql)]
+
+
+def split_script(text):
+    # statement boundaries, keeping trigger bodies (BEGIN ... END;) whole
+    out, buf = [], ""
+    for piece in text.split(";"):
+        buf += piece + ";"
+        if sqlite3.complete_statement(buf):
+            out.append(buf.strip())
+            buf = ""
+    return [s for s in out if s.strip(";").strip()]
+
+
+async def migrated_schema(path):
+    import bot
+    bot.DB = bot.Database(path)
+    await bot.DB.open()
+    await bot.init_db()
+    await bot.DB.close()
+
+
+def explain(conn, sql):
+    numbered = [int(n) for n in re.findall(r"\?(\d+)", sql)]
+    params = [None] * (max(numbered) if numbered else sql.count("?"))
+    return [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--verbose", action="store_true")
+    args = ap.parse_args()
+    import logging
+    logging.disable(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "plans.db")
+        asyncio.run(migrated_schema(path))
+        conn = sqlite3.connect(path)
+        statements = collect_statements(BOT_PY)
+        failures = 0
+        for owner, lineno, sql in statements:
+            try:
+                plan = explain(conn, sql)
+            except sqlite3.Error as e:
+                print(f"ERROR  bot.py:{lineno} {owner}: {e}\n       {sql.strip()[:120]}")
+                failures += 1
+                continue
+            scans = {t for line in plan for t in SCAN.findall(line.strip()) if t not in SMALL_TABLES}
+            bad = sorted(t for t in scans if (owner, t) not in ALLOWED_SCANS)
+            if bad:
+                failures += 1
+                print(f"SCAN   bot.py:{lineno} {owner}: {', '.join(bad)}\n       {' '.join(sql.split())[:160]}")
+                for line in plan:
+                    print(f"         {line}")
+            elif args.verbose:
+                print(f"ok     bot.py:{lineno} {owner}: {' | '.join(plan)}")
+        print(f"{len(statements)} statements checked, {failures} with full scans or errors")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
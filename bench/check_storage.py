@@ -0,0 +1,270 @@
+# bench/check_storage.py
+# Storage backends: (1) conformance — one scenario (creators and their referrals, mini bot joins with ref_reward,
+# tasks, claims settled twice and concurrently, withdrawals and their review queues, a broadcast drained by
+# competing lanes, exports, stats and counter repair) run through SqliteStorage and PostgresStorage must read
+# back the same; (2) throughput — joins, claims and settlements driven concurrently across N bots on each
+# backend.
+# PostgreSQL runs in a scratch schema (dropped first) of the database --dsn points at; without --dsn only
+# SQLite runs.
+# Usage: python bench/check_storage.py [--dsn postgresql://user:pw@host/db] [--bots 8,32] [--users 200]
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+import bot  # noqa: E402
+
+SCHEMA = "check_storage"
+TIME_COLUMNS = {"joined_at", "created_at"}
+
+
+async def open_store(backend, tmp, dsn):
+    bot.CONFIGS.load([])
+    if backend == "sqlite":
+        bot.DB_PATH = os.path.join(tmp, f"builder-{time.monotonic_ns()}.db")
+        bot.TENANT_DB_DIR = ""
+        store = bot.SqliteStorage()
+    else:
+        import asyncpg
+        conn = await asyncpg.connect(dsn)
+        await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE; CREATE SCHEMA {SCHEMA}")
+        await conn.close()
+        # asyncpg passes unknown DSN parameters on as server settings
+        store = bot.PostgresStorage(f"{dsn}{'&' if '?' in dsn else '?'}search_path={SCHEMA}")
+    await store.open()
+    bot.STORE = store
+    return store
+
+
+async def scenario(st):
+    out = {}
+    day = datetime.utcnow().date().isoformat()
+    # creators: a referral chain, a self-referral, an unknown referrer, a repeated /start
+    for u in range(1, 21):
+        await st.set_creator_if_new(u, f"creator{u}", None if u == 1 else u - 1 if u % 5 else u)
+    await st.set_creator_if_new(21, "late", 999)
+    await st.set_creator_if_new(5, "again", 2)
+    out["builder top"] = await st.top_referrers(bot.BUILDER_GRAPH)
+    out["builder refs"] = [await st.get_referral_counts(bot.BUILDER_GRAPH, u) for u in (1, 3, 4, 19)]
+    out["referrer"] = [await st.get_creator_referrer(u) for u in (1, 2, 5, 21, 77)]
+
+    bots = [await st.create_mini_bot(owner, f"{700 + owner}:STORE", f"store{owner}_bot", f"S{owner}")
+            for owner in (2, 3, 4)]
+    await st.update_mini_setting(bots[0], "ref_reward", 2.0)
+    await st.update_mini_setting(bots[1], "min_withdraw", 5.0)
+    out["bots"] = [await st.get_mini_bot(b) for b in bots]
+    out["owner bots"] = await st.get_owner_mini_bots(3)
+
+    # joins in concurrent bursts; a referrer always joined in an earlier burst, so who counts is deterministic
+    for start in range(0, 300, 50):
+        jobs = []
+        for b in bots:
+            for u in range(start, start + 50):
+                ref = None if u < 50 or u % 7 == 0 else 1_000 + (u * 31) % start
+                jobs.append(st.record_mini_join(b, bot.CONFIGS.get(b).owner_id, 1_000 + u, ref))
+        out.setdefault("new joins", []).append(sum(await asyncio.gather(*jobs)))
+    out["rejoin"] = await st.record_mini_join(bots[0], 2, 1_010, None)
+    out["users"] = [await st.count_mini_users(b) for b in bots]
+    out["bot stats"] = [await st.get_bot_stats(b, day) for b in bots]
+    out["top"] = [await st.top_referrers(b) for b in bots]
+    out["refs"] = [await st.get_referral_counts(bots[0], 1_000 + u) for u in range(0, 60, 3)]
+    out["owner balances"] = [round(await st.get_balance("builder_user", str(u)), 6) for u in range(1, 6)]
+    out["ref rewards"] = round(sum([await st.get_balance("mini_user", f"{bots[0]}:{1_000 + u}")
+                                    for u in range(300)]), 6)
+
+    # tasks and claims: double claims, concurrent overlapping settlement, a range, a rejection, an unfunded owner
+    for b in bots:
+        await st.create_task(b, "join the channel", 0.5)
+        await st.create_task(b, "follow", 40.0)
+    tasks = [await st.list_tasks(b) for b in bots]
+    out["tasks"] = tasks
+    out["task exists"] = [await st.task_exists(bots[0], tasks[0][0][0]), await st.task_exists(bots[1], tasks[0][0][0])]
+    claimed = []
+    for i, b in enumerate(bots):
+        for u in range(40):
+            claimed.append(await st.claim_task(b, tasks[i][u % 2][0], 1_000 + u, f"proof {u}"))
+        claimed.append(await st.claim_task(b, tasks[i][0][0], 1_000, "again"))
+    out["claimed"] = claimed
+    page = await st.list_pending_claims_page(bots[0], limit=30)
+    ids = [r[0] for r in page]
+    out["page"] = page
+    out["page back"] = await st.list_pending_claims_page(bots[0], before_id=ids[10], limit=5)
+    out["before"] = [await st.has_pending_claims_before(bots[0], ids[0]), await st.has_pending_claims_before(bots[0], ids[5])]
+    await st.add_balance("builder_user", "2", 10_000.0)
+    settled = await asyncio.gather(st.settle_claims(bots[0], 2, ids[:20]), st.settle_claims(bots[0], 2, ids[10:]),
+                                   st.approve_claims_range(bots[0], 2, ids[0], ids[-1]))
+    paid = {}
+    for result in settled:
+        for claim_id, (outcome, _, _) in result.items():
+            paid[claim_id] = paid.get(claim_id, 0) + (outcome == bot.CLAIM_APPROVED)
+    out["settled once"] = sorted(set(paid.values()))
+    out["settle again"] = await st.settle_claims(bots[0], 2, ids + [10 ** 9])
+    rest = [r[0] for r in await st.list_pending_claims_page(bots[1], limit=40)]
+    out["reject"] = await st.settle_claims(bots[1], 3, rest[:10], approve=False)
+    out["unfunded"] = await st.settle_claims(bots[1], 3, rest[10:])
+    out["claim balances"] = [round(await st.get_balance("mini_user", f"{b}:{1_000 + u}"), 6)
+                             for b in bots for u in range(40)]
+
+    # ledger and withdrawals
+    out["debit"] = [await st.debit_balance("builder_user", "4", 1.0), await st.debit_balance("builder_user", "4", 10 ** 6)]
+    out["withdraw"] = [
+        await st.record_withdraw_request("mini_user", bots[0], 1_001, 0.5, "NGN", "pending", "mini_user", f"{bots[0]}:1001"),
+        await st.record_withdraw_request("mini_user", bots[0], 1_002, 10 ** 6, "NGN", "pending", "mini_user", f"{bots[0]}:1002"),
+        await st.record_withdraw_request("builder", None, 3, 2.0, "NGN", "requested", "builder_user", "3"),
+    ]
+    out["after withdraw"] = [round(await st.get_balance("mini_user", f"{bots[0]}:1001"), 6),
+                             round(await st.get_balance("builder_user", "3"), 6)]
+
+    # withdrawal queues: paging, a page paid and a page rejected at once, single settles, settling twice
+    for u in range(12):
+        await st.record_withdraw_request("mini_user", bots[0], 1_000 + u, 0.25, "NGN", bot.WITHDRAW_PENDING_ADMIN,
+                                         "mini_user", f"{bots[0]}:{1_000 + u}")
+    for u in (2, 4, 2):
+        await st.record_withdraw_request("mini_admin_to_owner", None, u, 1.0, "NGN", bot.WITHDRAW_PENDING_OWNER,
+                                         "builder_user", str(u))
+    page = await st.list_pending_withdrawals_page(bots[0], limit=5)
+    wids = [r[0] for r in page]
+    out["wd page"] = [r[:4] for r in page]
+    out["wd back"] = [r[:4] for r in await st.list_pending_withdrawals_page(bots[0], before_id=wids[3], limit=2)]
+    out["wd before"] = [await st.has_pending_withdrawals_before(bots[0], wids[0]),
+                        await st.has_pending_withdrawals_before(bots[0], wids[2])]
+    owner_queue = await st.list_pending_withdrawals_page(None)
+    out["wd owner queue"] = [r[:4] for r in owner_queue]
+    out["wd pay page"] = await st.settle_withdrawals_range(bots[0], wids[0], wids[-1])
+    rest = [r[0] for r in await st.list_pending_withdrawals_page(bots[0], limit=20)]
+    out["wd reject"] = await st.settle_withdrawals(bots[0], rest[:2] + rest[:1], approve=False)
+    out["wd reject page"] = await st.settle_withdrawals_range(bots[0], rest[2], rest[5], approve=False)
+    out["wd again"] = await st.settle_withdrawals(bots[0], wids[:2] + rest[:2] + [owner_queue[0][0]])
+    out["wd owner"] = await st.settle_withdrawals_range(None, owner_queue[0][0], owner_queue[-1][0], approve=False)
+    out["wd left"] = [r[0] for r in await st.list_pending_withdrawals_page(bots[0])] + \
+                     [r[0] for r in await st.list_pending_withdrawals_page(None)]
+    out["wd balances"] = [round(await st.get_balance("mini_user", f"{bots[0]}:{1_000 + u}"), 6) for u in range(12)] + \
+                         [round(await st.get_balance("builder_user", str(u)), 6) for u in (2, 4)]
+
+    # a broadcast to everyone, drained by competing lanes: every delivery claimed exactly once
+    job_id, total = await st.create_broadcast_job(None, 1, 1, "hello")
+    one_bot = await st.create_broadcast_job(bots[2], 4, 4, "hi")
+    out["jobs"] = (total, one_bot[1], [r[1] for r in await st.list_active_broadcast_jobs()])
+    seen = []
+    for b in sorted(await st.list_pending_delivery_bots(job_id)):
+        while True:
+            lanes = await asyncio.gather(*(st.claim_deliveries(job_id, b, 40) for _ in range(4)))
+            if not any(lanes):
+                break
+            seen += [(b, u) for lane in lanes for u in lane]
+            for lane in lanes:
+                await st.record_deliveries(job_id, b, [(u, "blocked" if u % 25 == 0 else "sent") for u in lane])
+    out["claimed once"] = (len(seen), len(set(seen)))
+    out["failed"] = await st.fail_deliveries(job_id, None, "pending")
+    out["finished"] = [await st.finish_broadcast_job(job_id), await st.finish_broadcast_job(job_id)]
+    out["unfinished"] = await st.finish_broadcast_job(one_bot[0])
+    out["failed bot"] = await st.fail_deliveries(one_bot[0], bots[2], "pending")
+    out["job"] = (await st.get_broadcast_job(job_id))[5:10]
+    unblocked = await st.record_mini_join(bots[0], 2, 1_000, None)
+    again = await st.create_broadcast_job(bots[0], 2, 2, "again")
+    out["blocked"] = (unblocked, again[1])
+
+    # exports (rows compared as sets: per-bot claims come out task by task), stats, counter repair
+    for kind in bot.EXPORT_COLUMNS:
+        keep = [i for i, c in enumerate(bot.EXPORT_COLUMNS[kind]) if c not in TIME_COLUMNS]
+        for scope in (None, bots[0]):
+            rows = [tuple(r[i] for i in keep) async for chunk in st.iter_export_rows(kind, scope, chunk=37) for r in chunk]
+            out[f"export {kind} {scope}"] = sorted(rows, key=repr)
+    out["system"] = await st.get_system_stats(day)
+    out["drift"] = {k: v for k, v in (await st.rebuild_counters()).items() if v[0] != v[1]}
+    out["records"] = [r[0] for r in await st.get_mini_bots_records(bots[1:])]
+    await st.set_mini_bot_disabled(bots[1], "revoked")
+    out["running"] = ([r[0] for r in await st.get_all_mini_bots_records()], await st.list_mini_bot_ids())
+    return out
+
+
+async def conformance(args, tmp):
+    results = {}
+    for backend in args.backends:
+        st = await open_store(backend, tmp, args.dsn)
+        results[backend] = await scenario(st)
+        await st.close()
+    base = results["sqlite"]
+    ok = True
+    for backend, got in results.items():
+        bad = [k for k in base if base[k] != got[k]]
+        ok &= not bad
+        checks = (got["settled once"] == [1] and got["claimed once"][0] == got["claimed once"][1] and not got["drift"]
+                  and all(o == bot.CLAIM_ALREADY_SETTLED for o, _, _ in list(got["settle again"].values())[:-1]))
+        ok &= checks
+        print(f"check {backend:8}  {len(got)} outcomes, {sum(got['new joins'])} joins, "
+              f"{got['claimed once'][0]} deliveries  {'ok' if checks and not bad else 'MISMATCH'}")
+        for k in bad:
+            print(f"  {k}:\n    sqlite   {str(base[k])[:300]}\n    {backend:8} {str(got[k])[:300]}")
+    return ok
+
+
+def ms(samples):
+    samples = sorted(samples)
+    return f"p50 {statistics.median(samples) * 1000:6.2f} ms  p99 {samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1000:7.2f} ms"
+
+
+async def bot_workload(st, bot_id, users, lat):
+    # bench_tenants' traffic: every user joins (some referred) and claims; the admin settles in pages of 20
+    task_id = (await st.list_tasks(bot_id))[0][0]
+    for u in range(users):
+        t = time.perf_counter()
+        await st.record_mini_join(bot_id, 42, 1_000 + u, 1_000 + u // 2 if u else None)
+        lat["join"].append(time.perf_counter() - t)
+        t = time.perf_counter()
+        await st.claim_task(bot_id, task_id, 1_000 + u, "proof")
+        lat["claim"].append(time.perf_counter() - t)
+        if u % 20 == 19:
+            ids = [r[0] for r in await st.list_pending_claims_page(bot_id, limit=20)]
+            t = time.perf_counter()
+            await st.settle_claims(bot_id, 42, ids, approve=(u // 20) % 4 != 3)
+            lat["settle"].append(time.perf_counter() - t)
+
+
+async def throughput(backend, n, args, tmp):
+    st = await open_store(backend, tmp, args.dsn)
+    bot_ids = [await st.create_mini_bot(42, f"{900_000 + i}:STORE", f"load{i}_bot", f"L{i}") for i in range(n)]
+    for b in bot_ids:
+        await st.create_task(b, "join the channel", 1.0)
+    await st.add_balance("builder_user", "42", 10.0 ** 9)
+    lat = {"join": [], "claim": [], "settle": []}
+    t0 = time.perf_counter()
+    await asyncio.gather(*(bot_workload(st, b, args.users, lat) for b in bot_ids))
+    elapsed = time.perf_counter() - t0
+    users = sum([await st.count_mini_users(b) for b in bot_ids])
+    await st.close()
+    writes = sum(len(v) for v in lat.values())
+    print(f"bots={n:>3} {backend:8}  {writes / elapsed:7.0f} writes/s  ({elapsed:5.2f}s, {users} users)")
+    for k, v in lat.items():
+        print(f"{'':22}{k:7}{ms(v)}")
+
+
+async def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--dsn", default=os.environ.get("BOT_POSTGRES_DSN", ""))
+    ap.add_argument("--bots", default="8,32")
+    ap.add_argument("--users", type=int, default=200)
+    args = ap.parse_args()
+    logging.disable(logging.WARNING)
+    args.backends = ["sqlite", "postgres"] if args.dsn else ["sqlite"]
+    if not args.dsn:
+        print("no --dsn: PostgreSQL skipped")
+    print(f"{os.cpu_count()} CPU, PostgreSQL pool {bot.POSTGRES_POOL_MIN}-{bot.POSTGRES_POOL_MAX}")
+    with tempfile.TemporaryDirectory() as tmp:
+        ok = await conformance(args, tmp)
+        for n in (int(b) for b in args.bots.split(",") if b):
+            for backend in args.backends:
+                await throughput(backend, n, args, tmp)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,288 @@
+# bench/fake_telegram.py
+# Local stand-in for the Telegram Bot API (stdlib asyncio, HTTP/1.1 keep-alive).
+# Serves /bot<token>/<method> for any token. getUpdates long-polls against a per-token queue that
+# benchmarks fill with push_update(). Run standalone: python bench/fake_telegram.py --port 8081
+# A standalone server is driven over HTTP: POST /_driver/flood {"tokens", "count", "text"} queues message
+# updates round-robin over the tokens, POST /_driver/stats returns call counts.
+# In-process drivers also get: 429 injection (inject_429), reply latency (push -> first sendMessage or
+# editMessageText to that chat), the last message sent to each chat, and per-token sendMessage timestamps.
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import Counter, defaultdict, deque
+from typing import Deque, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl
+
+
+class ApiError(Exception):
+    def __init__(self, code: int, description: str, retry_after: Optional[int] = None):
+        super().__init__(description)
+        self.code = code
+        self.description = description
+        self.retry_after = retry_after
+
+    def payload(self) -> dict:
+        out = {"ok": False, "error_code": self.code, "description": self.description}
+        if self.retry_after is not None:
+            out["parameters"] = {"retry_after": self.retry_after}
+        return out
+
+
+def _bot_user(token: str) -> dict:
+    tg_id = int(token.split(":", 1)[0])
+    return {"id": tg_id, "is_bot": True, "first_name": f"Bot {tg_id}", "username": f"fake{tg_id}_bot"}
+
+
+def _multipart(content_type: str, body: bytes) -> dict:
+    # form fields as str, file fields as (filename, bytes); a plain split keeps big uploads to one copy
+    boundary = b"--" + content_type.split("boundary=", 1)[1].strip('"').encode()
+    out = {}
+    for part in body.split(boundary)[1:-1]:
+        head, _, data = part.partition(b"\r\n\r\n")
+        line = next(h for h in head.decode("latin-1").split("\r\n") if h.lower().startswith("content-disposition"))
+        disposition = dict(p.strip().split("=", 1) for p in line.split(";") if "=" in p)
+        name, filename = disposition.get("name", "").strip('"'), disposition.get("filename", "").strip('"')
+        data = data[:-2]   # CRLF before the next boundary
+        out[name] = (filename, data) if filename else data.decode()
+    return out
+
+
+class FakeTelegram:
+    def __init__(self, latency: float = 0.0, poll_hold: Optional[float] = None, rate_limit: Optional[int] = None,
+                 inject_429: float = 0.0, retry_after: int = 1, seed: int = 1):
+        self.latency = latency            # added to every call
+        self.poll_hold = poll_hold        # caps how long an empty getUpdates is held
+        self.rate_limit = rate_limit      # sendMessage per token per second before answering 429
+        self.inject_429 = inject_429      # share of calls (other than getMe/getUpdates) answered 429 at random
+        self.retry_after = retry_after
+        self.throttled = 0                # 429s handed out (rate limit and injected)
+        self._rnd = random.Random(seed)
+        self.reply_latency: List[float] = []   # seconds from push_update to the bot's answer in that chat
+        self.reply_chats: List[int] = []       # chat of each reply_latency entry
+        self._awaiting: Dict[Tuple[str, int], Deque[float]] = defaultdict(deque)
+        self.last_message: Dict[Tuple[str, int], dict] = {}   # (token, chat_id) -> params of the last send/edit
+        self.replies: Counter = Counter()   # (token, chat_id) -> sendMessage + editMessageText calls
+        self.send_times: Dict[str, List[float]] = defaultdict(list)
+        self.documents: List[Tuple[str, int, str, bytes]] = []   # sendDocument uploads: (token, chat_id, name, bytes)
+        self.revoked: set = set()         # tokens answered with 401 Unauthorized
+        self.slow: Dict[str, float] = {}  # token -> extra seconds on every call
+        self.deliveries: Counter = Counter()  # (token, chat_id) -> messages sent
+        self._windows: Dict[str, List[float]] = {}
+        self.calls: Counter = Counter()   # method -> count
+        self.connections = 0
+        self._queues: Dict[str, List[dict]] = defaultdict(list)
+        self._waiters: Dict[str, asyncio.Event] = {}
+        self._next_update_id = 1
+        self._next_message_id = 1
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    # ---------------- test driver API ----------------
+
+    def push_update(self, token: str, update: dict) -> int:
+        chat = (update.get("message") or update.get("callback_query", {}).get("message") or {}).get("chat")
+        if chat:
+            self._awaiting[(token, chat["id"])].append(time.monotonic())
+        update = dict(update, update_id=self._next_update_id)
+        self._next_update_id += 1
+        self._queues[token].append(update)
+        ev = self._waiters.get(token)
+        if ev:
+            ev.set()
+        return update["update_id"]
+
+    def message_update(self, token: str, user_id: int, text: str) -> dict:
+        return {
+            "message": {
+                "message_id": self._new_message_id(),
+                "date": int(time.time()),
+                "chat": {"id": user_id, "type": "private"},
+                "from": {"id": user_id, "is_bot": False, "first_name": f"user{user_id}"},
+                "text": text,
+                "entities": [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+                if text.startswith("/") else [],
+            }
+        }
+
+    def callback_update(self, token: str, user_id: int, data: str, message_id: int) -> dict:
+        # inline button press on a message the bot sent to user_id's private chat
+        return {
+            "callback_query": {
+                "id": str(self._new_message_id()),
+                "chat_instance": str(user_id),
+                "from": {"id": user_id, "is_bot": False, "first_name": f"user{user_id}"},
+                "data": data,
+                "message": {"message_id": message_id, "date": int(time.time()),
+                            "chat": {"id": user_id, "type": "private"}, "from": _bot_user(token), "text": "…"},
+            }
+        }
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        self._server = await asyncio.start_server(self._serve, host, port, backlog=4096)
+        port = self._server.sockets[0].getsockname()[1]
+        return f"http://{host}:{port}/bot"
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+    # ---------------- HTTP ----------------
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                _, path, _ = line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    h = await reader.readline()
+                    if h in (b"\r\n", b"\n", b""):
+                        break
+                    k, v = h.decode("latin-1").split(":", 1)
+                    headers[k.strip().lower()] = v.strip()
+                body = await reader.readexactly(int(headers.get("content-length", "0")))
+                status, payload = await self._route(path, headers.get("content-type", ""), body)
+                data = json.dumps(payload).encode()
+                writer.write(
+                    f"HTTP/1.1 {status} OK\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\nConnection: keep-alive\r\n\r\n".encode() + data
+                )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError, ValueError):
+            pass
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    async def _route(self, path: str, content_type: str, body: bytes):
+        if path.startswith("/_driver/"):
+            return 200, self._driver(path[len("/_driver/"):], json.loads(body or b"{}"))
+        try:
+            _, bot_part, method = path.split("/", 2)
+            token = bot_part[3:]
+            _bot_user(token)
+        except ValueError:
+            return 404, {"ok": False, "error_code": 404, "description": "Not Found"}
+        if "json" in content_type:
+            params = json.loads(body or b"{}")
+        elif "x-www-form-urlencoded" in content_type:
+            params = dict(parse_qsl(body.decode()))
+        elif "multipart/form-data" in content_type:
+            params = _multipart(content_type, body)
+        else:
+            params = {}
+        self.calls[method] += 1
+        if self.latency or token in self.slow:
+            await asyncio.sleep(self.latency + self.slow.get(token, 0.0))
+        if token in self.revoked:
+            return 401, {"ok": False, "error_code": 401, "description": "Unauthorized"}
+        try:
+            result = await self.dispatch(token, method, params)
+        except ApiError as e:
+            return e.code, e.payload()
+        return 200, {"ok": True, "result": result}
+
+    def _driver(self, action: str, params: dict) -> dict:
+        if action == "flood":
+            tokens, text = params["tokens"], params.get("text", "/start")
+            user_base = int(params.get("user_base", 1_000_000))
+            for i in range(int(params["count"])):
+                token = tokens[i % len(tokens)]
+                self.push_update(token, self.message_update(token, user_base + i, text))
+            return {"pushed": int(params["count"])}
+        if action == "stats":
+            return {"calls": dict(self.calls), "sent": sum(self.deliveries.values())}
+        return {}
+
+    # ---------------- Bot API methods ----------------
+
+    def _new_message_id(self) -> int:
+        self._next_message_id += 1
+        return self._next_message_id
+
+    async def dispatch(self, token: str, method: str, params: dict):
+        if method == "getMe":
+            return _bot_user(token)
+        if method == "getUpdates":
+            return await self._get_updates(token, int(params.get("offset", 0) or 0), float(params.get("timeout", 0) or 0))
+        if method not in ("getMe", "getUpdates") and self.inject_429 and self._rnd.random() < self.inject_429:
+            self.throttled += 1
+            raise ApiError(429, f"Too Many Requests: retry after {self.retry_after}", retry_after=self.retry_after)
+        if method in ("sendMessage", "editMessageText"):
+            chat_id = int(params.get("chat_id", 0))
+            if method == "sendMessage":
+                self._check_rate(token)
+                self.deliveries[(token, chat_id)] += 1
+                self.send_times[token].append(time.monotonic())
+            self.last_message[(token, chat_id)] = params
+            self.replies[(token, chat_id)] += 1
+            waiting = self._awaiting.get((token, chat_id))
+            if waiting:
+                self.reply_latency.append(time.monotonic() - waiting.popleft())
+                self.reply_chats.append(chat_id)
+            return {
+                "message_id": int(params.get("message_id", 0)) or self._new_message_id(),
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"},
+                "from": _bot_user(token),
+                "text": params.get("text", ""),
+            }
+        if method == "sendDocument":
+            name, data = next((v for v in params.values() if isinstance(v, tuple)), ("", b""))
+            self.documents.append((token, int(params.get("chat_id", 0)), name, data))
+            return True
+        if method == "getChatMember":
+            return {"status": "member", "user": {"id": int(params.get("user_id", 0)), "is_bot": False, "first_name": "u"}}
+        # answerCallbackQuery, setWebhook, deleteWebhook, setMyCommands, ...
+        return True
+
+    def _check_rate(self, token: str):
+        if not self.rate_limit:
+            return
+        now = time.monotonic()
+        window = self._windows.setdefault(token, [now, 0])
+        if now - window[0] >= 1.0:
+            window[0], window[1] = now, 0
+        window[1] += 1
+        if window[1] > self.rate_limit:
+            self.throttled += 1
+            raise ApiError(429, "Too Many Requests: retry after 1", retry_after=1)
+
+    async def _get_updates(self, token: str, offset: int, timeout: float):
+        q = self._queues[token]
+        if offset:
+            q[:] = [u for u in q if u["update_id"] >= offset]
+        if not q and timeout:
+            if self.poll_hold is not None:
+                timeout = min(timeout, self.poll_hold)
+            ev = self._waiters.setdefault(token, asyncio.Event())
+            ev.clear()
+            try:
+                await asyncio.wait_for(ev.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return list(q[:100])
+
+
+async def _main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8081)
+    ap.add_argument("--latency", type=float, default=0.0)
+    ap.add_argument("--rate-limit", type=int, default=None)
+    ap.add_argument("--inject-429", type=float, default=0.0)
+    args = ap.parse_args()
+    api = FakeTelegram(latency=args.latency, rate_limit=args.rate_limit, inject_429=args.inject_429)
+    url = await api.start(args.host, args.port)
+    print(f"fake Bot API listening on {url}", flush=True)
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
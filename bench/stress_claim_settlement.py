@@ -0,0 +1,138 @@
+# bench/stress_claim_settlement.py
+# Concurrency stress for task-claim settlement: double taps, overlapping "approve all on this page" and
+# rejects all racing on the same claims while the owner's balance covers only part of them.
+# Runs the old read-check-then-write approval sequence and settle_claims on the same workload and checks
+# the invariants: no claim paid twice, owner never below zero, money conserved, statuses match payouts.
+# Usage: python bench/stress_claim_settlement.py [--claims 400] [--taps 4] [--budget 0.6] [--seed 3]
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import bot  # noqa: E402
+
+BOT_OWNER = 42
+REWARD = 5.0
+
+
+async def legacy_approve(bot_id, owner_id, claim_id):
+    # the pre-settlement handler: five round trips, check and debit not atomic, no pending guard
+    async with bot.DB.read() as db:
+        cur = await db.execute("SELECT tc.user_id, COALESCE(t.reward, 0) FROM task_claims tc "
+                               "LEFT JOIN tasks t ON tc.task_id=t.id WHERE tc.id=?", (claim_id,))
+        user_id, reward = await cur.fetchone()
+    if await bot.get_balance("builder_user", str(owner_id)) < reward:
+        async with bot.DB.write() as db:
+            await db.execute("UPDATE task_claims SET status='rejected' WHERE id=?", (claim_id,))
+        return
+    await bot.add_balance("builder_user", str(owner_id), -reward)
+    await bot.add_balance("mini_user", f"{bot_id}:{user_id}", reward)
+    async with bot.DB.write() as db:
+        await db.execute("UPDATE task_claims SET status='approved' WHERE id=?", (claim_id,))
+
+
+async def legacy_reject(bot_id, owner_id, claim_id):
+    async with bot.DB.write() as db:
+        await db.execute("UPDATE task_claims SET status='rejected' WHERE id=?", (claim_id,))
+
+
+def actions(n_claims, taps, rnd):
+    # per claim: `taps` approve taps, sometimes a reject; plus overlapping page approvals
+    out = []
+    for cid in range(1, n_claims + 1):
+        out += [("approve", cid)] * taps
+        if rnd.random() < 0.1:
+            out.append(("reject", cid))
+    for first in range(1, n_claims + 1, 3):
+        out.append(("page", first, min(n_claims, first + 9)))
+    rnd.shuffle(out)
+    return out
+
+
+async def run(mode, n_claims, taps, budget, seed):
+    rnd = random.Random(seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        bot.DB = bot.Database(os.path.join(tmp, "stress.db"))
+        await bot.DB.open()
+        await bot.init_db()
+        bot_id = await bot.create_mini_bot(BOT_OWNER, "9:STRESS", "s", "Stress")
+        await bot.create_task(bot_id, "task", REWARD)
+        for u in range(n_claims):
+            await bot.claim_task(bot_id, 1, 1000 + u, "proof")
+        funded = round(n_claims * REWARD * budget, 2)
+        await bot.add_balance("builder_user", str(BOT_OWNER), funded)
+
+        async def do(act):
+            try:
+                if mode == "legacy":
+                    if act[0] == "page":
+                        for cid in range(act[1], act[2] + 1):
+                            await legacy_approve(bot_id, BOT_OWNER, cid)
+                    else:
+                        await (legacy_approve if act[0] == "approve" else legacy_reject)(bot_id, BOT_OWNER, act[1])
+                elif act[0] == "page":
+                    await bot.approve_claims_range(bot_id, BOT_OWNER, act[1], act[2])
+                else:
+                    await bot.settle_claims(bot_id, BOT_OWNER, [act[1]], approve=act[0] == "approve")
+            except Exception as e:
+                errors.append(repr(e))
+
+        errors = []
+        work = actions(n_claims, taps, rnd)
+        t0 = time.perf_counter()
+        await asyncio.gather(*(do(a) for a in work))
+        elapsed = time.perf_counter() - t0
+
+        async with bot.DB.read() as db:
+            cur = await db.execute("SELECT balance FROM balances WHERE scope='builder_user' AND owner_key=?",
+                                   (str(BOT_OWNER),))
+            owner = float((await cur.fetchone())[0])
+            cur = await db.execute("SELECT COALESCE(SUM(balance), 0), COALESCE(MAX(balance), 0) FROM balances "
+                                   "WHERE scope='mini_user'")
+            credited, max_user = (float(v) for v in await cur.fetchone())
+            cur = await db.execute("SELECT COUNT(*) FROM task_claims WHERE status='approved'")
+            approved = (await cur.fetchone())[0]
+        await bot.DB.close()
+
+    problems = []
+    if owner < -1e-9:
+        problems.append(f"owner overdrawn to {owner:.2f}")
+    if max_user > REWARD + 1e-9:
+        problems.append(f"a claim paid more than once (user balance {max_user:.2f})")
+    if abs(owner + credited - funded) > 1e-6:
+        problems.append(f"money not conserved ({owner:.2f} + {credited:.2f} != {funded:.2f})")
+    if abs(approved * REWARD - credited) > 1e-6:
+        problems.append(f"{approved} approved claims but {credited / REWARD:.0f} rewards paid")
+    print(f"{mode:7s} {len(work)} actions in {elapsed:5.2f}s  approved={approved}  paid={credited:.2f}  "
+          f"owner={owner:.2f}  errors={len(errors)}")
+    for p in problems:
+        print(f"        ✗ {p}")
+    return not problems and not errors
+
+
+async def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--claims", type=int, default=400)
+    ap.add_argument("--taps", type=int, default=4, help="approve taps per claim")
+    ap.add_argument("--budget", type=float, default=0.6, help="owner balance as a share of all rewards")
+    ap.add_argument("--seed", type=int, default=3)
+    ap.add_argument("--skip-legacy", action="store_true")
+    args = ap.parse_args()
+    import logging
+    logging.disable(logging.WARNING)
+
+    print(f"{args.claims} claims of ₦{REWARD:.2f}, {args.taps} taps each, owner funds {args.budget:.0%} of rewards")
+    if not args.skip_legacy:
+        await run("legacy", args.claims, args.taps, args.budget, args.seed)
+    ok = await run("settle", args.claims, args.taps, args.budget, args.seed)
+    print("settle_claims invariants hold" if ok else "settle_claims FAILED")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,386 @@
+# bench/suite.py
+# Synthetic load suite: every scenario runs the real handlers and engines in-process against the fake Bot API
+# (bench/fake_telegram.py, optional latency and random 429s) on a fresh temporary database, and checks the
+# invariants it can (joins recorded once, balances add up, no duplicate deliveries, per-token send rate).
+# Results go out as one JSON document so runs can be compared; --baseline fails the run (exit 1) when a
+# scenario's throughput drops or its p99 latency grows by more than --tolerance.
+#   start_storm  /start flood over N bots, every other user referred by an earlier one
+#   broadcast    /broadcastall fan-out to bots x users recipients until the job is done
+#   tasks        owners /addtask, users /claimtask, owners approve every page via the review buttons
+#   boot         MANAGER.boot() of N bots, a few of them with revoked tokens
+# Usage: python -m bench.suite [--scenarios start_storm,broadcast,tasks,boot] [--bots 20] [--users 100]
+#            [--latency 0.0] [--inject-429 0.0] [--group-commit] [--out results.json]
+#            [--repeat 3] [--baseline old.json] [--tolerance 0.15]
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+import bot  # noqa: E402
+from bench.fake_telegram import FakeTelegram  # noqa: E402
+
+USER_BASE = 10_000_000
+
+
+def percentiles(samples):
+    # milliseconds; nearest-rank like MANAGER.boot's report
+    s = sorted(samples)
+    pct = lambda q: round(s[min(len(s) - 1, int(q * len(s)))] * 1000, 2) if s else 0.0
+    return {"p50": pct(0.50), "p95": pct(0.95), "p99": pct(0.99), "max": round(s[-1] * 1000, 2) if s else 0.0}
+
+
+def max_rate_1s(times):
+    # most sends inside any 1s window
+    best, lo = 0, 0
+    for hi, t in enumerate(times):
+        while t - times[lo] >= 1.0:
+            lo += 1
+        best = max(best, hi - lo + 1)
+    return best
+
+
+def fresh_state():
+    # module-level singletons hold per-run state (bots, buckets, caches): start every scenario clean
+    bot.MANAGER = bot.BotManager()
+    bot.BROADCASTER = bot.BroadcastEngine()
+    bot.CONFIGS = bot.MiniBotConfigRegistry()
+    bot.MEMBERSHIP_CACHE = bot.MembershipCache()
+    bot.RATE_LIMITER = bot.SlidingWindowLimiter()
+    bot.JOIN_WRITER = bot.JoinWriter()
+    bot.EXPORTS = bot.ExportRunner()
+
+
+@asynccontextmanager
+async def environment(args, name):
+    api = FakeTelegram(latency=args.latency, inject_429=args.inject_429)
+    bot.TELEGRAM_API_BASE = await api.start()
+    bot.MAIN_BUILDER_TOKEN = "1:BUILDER"
+    fresh_state()
+    with tempfile.TemporaryDirectory() as tmp:
+        bot.DB = bot.Database(os.path.join(tmp, f"{name}.db"))
+        await bot.DB.open()
+        await bot.init_db()
+        try:
+            yield api
+        finally:
+            await bot.EXPORTS.stop()
+            await bot.BROADCASTER.stop()
+            await bot.MANAGER.stop_all()
+            await bot.JOIN_WRITER.stop()
+            await bot.DB.close()
+            await api.stop()
+
+
+async def add_bots(count, first_tg_id, owner=lambda i: 42):
+    tokens = {}
+    for i in range(count):
+        token = f"{first_tg_id + i}:SUITE"
+        bot_id = await bot.create_mini_bot(owner(i), token, f"fake{first_tg_id + i}_bot", f"Bot {i}")
+        tokens[bot_id] = token
+    bot.CONFIGS.load(await bot.get_all_mini_bots_records())
+    return tokens
+
+
+async def until(progress, target, stall):
+    # waits for progress() to reach target; gives up after `stall` seconds without movement.
+    # Returns the count and when it last moved, so a stalled run isn't timed including the wait.
+    last, since = -1, time.perf_counter()
+    while True:
+        n = progress()
+        if n != last:
+            last, since = n, time.perf_counter()
+        if n >= target or time.perf_counter() - since > stall:
+            return n, since
+        await asyncio.sleep(0.01)
+
+
+async def scalar(sql, params=()):
+    async with bot.DB.read() as db:
+        cur = await db.execute(sql, params)
+        return (await cur.fetchone())[0]
+
+
+def result(name, params, elapsed, ops, latency, counts, problems):
+    return {
+        "scenario": name, "params": params, "elapsed_s": round(elapsed, 3),
+        "throughput_per_s": round(ops / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": percentiles(latency), "counts": counts, "ok": not problems, "problems": problems,
+    }
+
+
+# ---------------- scenarios ----------------
+
+async def start_storm(args):
+    params = {"bots": args.bots, "updates": args.updates, "group_commit": args.group_commit}
+    async with environment(args, "start_storm") as api:
+        tokens = list((await add_bots(args.bots, 700000)).values())
+        if args.group_commit:
+            bot.JOIN_WRITER.start()
+        await bot.MANAGER.start()
+        await bot.MANAGER.boot(list(bot.CONFIGS))
+
+        t0 = time.perf_counter()
+        for i in range(args.updates):
+            user = USER_BASE + i
+            # every other user arrives through the link of the user before them on the same bot
+            text = f"/start ref={user - args.bots}" if i >= args.bots and i % 2 else "/start"
+            api.push_update(tokens[i % len(tokens)], api.message_update(tokens[i % len(tokens)], user, text))
+        answered, done = await until(lambda: len(api.reply_latency), args.updates, args.stall)
+        elapsed = done - t0
+        await bot.JOIN_WRITER.stop()
+
+        joins = await scalar("SELECT COUNT(*) FROM mini_users WHERE user_id >= ?", (USER_BASE,))
+        referred = await scalar("SELECT COUNT(*) FROM mini_users WHERE ref_by IS NOT NULL")
+        earned = await bot.get_balance("builder_user", "42")
+        counts = {"updates": args.updates, "answered": answered, "joins": joins, "referred": referred,
+                  "owner_balance": earned, "api_429": api.throttled}
+        problems = []
+        if not args.inject_429 and answered < args.updates:
+            problems.append(f"{args.updates - answered} updates unanswered")
+        if joins > args.updates:
+            problems.append(f"{joins - args.updates} joins recorded twice")
+        if abs(earned - joins * bot.EARN_PER_USER_NAIRA) > 1e-6:
+            problems.append(f"owner balance {earned} != {joins} joins x {bot.EARN_PER_USER_NAIRA}")
+        return result("start_storm", params, elapsed, answered, api.reply_latency, counts, problems)
+
+
+async def broadcast(args):
+    params = {"bots": args.bots, "users_per_bot": args.users, "rate_per_bot": bot.BROADCAST_RATE}
+    async with environment(args, "broadcast") as api:
+        tokens = await add_bots(args.bots, 710000)
+        now = datetime.utcnow().isoformat()
+        async with bot.DB.write() as db:
+            await db.executemany("INSERT INTO mini_users(bot_id, user_id, joined_at) VALUES(?,?,?)",
+                                 [(b, USER_BASE + u, now) for b in tokens for u in range(args.users)])
+        await bot.MANAGER.start()
+        await bot.MANAGER.boot(list(bot.CONFIGS))
+
+        t0 = time.perf_counter()
+        mono0 = time.monotonic()
+        job_id, total = await bot.create_broadcast_job(None, 42, 42, "suite broadcast")
+        bot.BROADCASTER.start()
+        job = await bot.get_broadcast_job(job_id)
+        deadline = time.perf_counter() + args.stall + total / bot.BROADCAST_RATE / max(1, args.bots) * 4
+        while job[5] != "done" and time.perf_counter() < deadline:
+            await asyncio.sleep(0.05)
+            job = await bot.get_broadcast_job(job_id)
+        elapsed = time.perf_counter() - t0
+
+        sends = [t - mono0 for token in tokens.values() for t in api.send_times[token]]   # time into the fan-out
+        per_token = max((max_rate_1s(api.send_times[t]) for t in tokens.values()), default=0)
+        dupes = sum(1 for (token, _), n in api.deliveries.items() if n > 1 and token in tokens.values())
+        counts = {"recipients": total, "sent": job[7], "blocked": job[8], "failed": job[9], "status": job[5],
+                  "max_per_token_1s": per_token, "duplicates": dupes, "api_429": api.throttled}
+        problems = []
+        if job[5] != "done":
+            problems.append(f"job not done: {bot.broadcast_summary(job)}")
+        elif not args.inject_429 and job[7] != total:
+            problems.append(f"only {job[7]}/{total} sent")
+        if dupes:
+            problems.append(f"{dupes} recipients got the message twice")
+        if per_token > 30:
+            problems.append(f"{per_token} msgs/s on one token (Telegram allows 30)")
+        return result("broadcast", params, elapsed, job[7], sends, counts, problems)
+
+
+def _markup(params):
+    markup = params.get("reply_markup") or {}
+    return json.loads(markup) if isinstance(markup, str) else markup
+
+
+def _button(params, prefix):
+    for row in _markup(params).get("inline_keyboard", []):
+        for b in row:
+            if b.get("callback_data", "").startswith(prefix):
+                return b["callback_data"]
+    return None
+
+
+async def tasks(args):
+    # the flood guard would drop an owner's rapid page approvals: lifted, this measures the handlers
+    params = {"bots": args.bots, "users_per_bot": args.users, "tasks_per_bot": args.tasks,
+              "page_size": bot.REVIEW_PAGE_SIZE, "flood_guard": "off"}
+    async with environment(args, "tasks") as api:
+        bot.RATE_LIMITER = bot.SlidingWindowLimiter(limit=10 ** 9)
+        owner = lambda i: 900 + i
+        tokens = await add_bots(args.bots, 720000, owner)
+        owners = {b: owner(i) for i, b in enumerate(tokens)}
+        reward = 1.0
+        for o in owners.values():
+            await bot.add_balance("builder_user", str(o), args.users * args.tasks * reward)
+        await bot.MANAGER.start()
+        await bot.MANAGER.boot(list(bot.CONFIGS))
+        answered = lambda: len(api.reply_latency)
+        # with 429s injected a reply can be lost for good: press the button again after a short wait
+        patience = 2.0 + args.latency * 4 if args.inject_429 else args.stall
+
+        t0 = time.perf_counter()
+        expected = 0
+        for b, token in tokens.items():
+            for k in range(args.tasks):
+                api.push_update(token, api.message_update(token, owners[b], f"/addtask Suite task {k} | {reward}"))
+                expected += 1
+        await until(answered, expected, patience)
+        task_ids = {b: [r[0] for r in await bot.list_tasks(b)] for b in tokens}
+
+        for u in range(args.users):
+            for b, token in tokens.items():
+                for task_id in task_ids[b]:
+                    api.push_update(token, api.message_update(token, USER_BASE + u, f"/claimtask {task_id} done"))
+                    expected += 1
+        await until(answered, expected, patience)
+        claims = await scalar("SELECT COUNT(*) FROM task_claims WHERE status='pending'")
+
+        async def review(b, token):
+            # /review_tasks, then "approve all on this page" until no page is left
+            chat = owners[b]
+            pages = 0
+            seen = api.replies[(token, chat)]
+            api.push_update(token, api.message_update(token, chat, "/review_tasks"))
+            while True:
+                await until(lambda: api.replies[(token, chat)], seen + 1, patience)
+                seen = api.replies[(token, chat)]
+                data = _button(api.last_message.get((token, chat), {}), "task:approvepage:")
+                if not data:
+                    return pages
+                pages += 1
+                api.push_update(token, api.callback_update(token, chat, data, 1))
+
+        pages = sum(await asyncio.gather(*(review(b, t) for b, t in tokens.items())))
+        elapsed = time.perf_counter() - t0
+
+        approved = await scalar("SELECT COUNT(*) FROM task_claims WHERE status='approved'")
+        paid = 0.0
+        for b in tokens:
+            for u in range(args.users):
+                paid += await bot.get_balance("mini_user", f"{b}:{USER_BASE + u}")
+        left = 0.0
+        for o in owners.values():
+            left += await bot.get_balance("builder_user", str(o))
+        funded = len(owners) * args.users * args.tasks * reward
+        counts = {"tasks": sum(len(v) for v in task_ids.values()), "claims": claims, "approved": approved,
+                  "review_pages": pages, "paid": paid, "api_429": api.throttled}
+        problems = []
+        if not args.inject_429 and (claims != args.bots * args.users * args.tasks or approved != claims):
+            problems.append(f"{claims} claims, {approved} approved, expected {args.bots * args.users * args.tasks}")
+        if abs(paid + left - funded) > 1e-6:
+            problems.append(f"money not conserved: paid {paid} + left {left} != funded {funded}")
+        if abs(paid - approved * reward) > 1e-6:
+            problems.append(f"paid {paid} for {approved} approvals")
+        return result("tasks", params, elapsed, expected + pages, api.reply_latency, counts, problems)
+
+
+async def boot(args):
+    params = {"bots": args.boot_bots, "revoked": args.revoked, "concurrency": bot.BOOT_CONCURRENCY}
+    async with environment(args, "boot") as api:
+        tokens = list((await add_bots(args.boot_bots, 730000)).values())
+        api.revoked.update(tokens[:args.revoked])
+        bot.BOOT_RETRY_BASE = 3600.0   # keep retries out of the measurement
+        await bot.MANAGER.start()
+        t0 = time.perf_counter()
+        report = await bot.MANAGER.boot(list(bot.CONFIGS))
+        elapsed = time.perf_counter() - t0
+        out = result("boot", params, elapsed, report["ready"], [], report, [])
+        out["latency_ms"] = {"p50": report["init_p50_ms"], "p95": None, "p99": report["init_p99_ms"],
+                             "max": round(report["time_to_ready_s"] * 1000, 1)}
+        if report["ready"] != args.boot_bots - args.revoked:
+            out["problems"].append(f"{report['ready']} ready, expected {args.boot_bots - args.revoked}")
+            out["ok"] = False
+        return out
+
+
+SCENARIOS = {"start_storm": start_storm, "broadcast": broadcast, "tasks": tasks, "boot": boot}
+
+
+def compare(doc, baseline, tolerance):
+    # regressions against an earlier run of the same scenarios with the same parameters
+    old = {r["scenario"]: r for r in baseline.get("results", [])}
+    out = []
+    for r in doc["results"]:
+        prev = old.get(r["scenario"])
+        if not prev:
+            continue
+        if prev["params"] != r["params"] or baseline.get("settings") != doc["settings"]:
+            print(f"{r['scenario']}: baseline ran with other parameters, not compared", file=sys.stderr)
+            continue
+        if prev["throughput_per_s"] and r["throughput_per_s"] < prev["throughput_per_s"] * (1 - tolerance):
+            out.append(f"{r['scenario']}: throughput {r['throughput_per_s']}/s, was {prev['throughput_per_s']}/s")
+        p99, was = r["latency_ms"].get("p99"), prev["latency_ms"].get("p99")
+        if p99 and was and p99 > was * (1 + tolerance):
+            out.append(f"{r['scenario']}: p99 {p99}ms, was {was}ms")
+    return out
+
+
+def git_rev():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE, capture_output=True,
+                              text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+async def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--scenarios", default=",".join(SCENARIOS))
+    ap.add_argument("--bots", type=int, default=20)
+    ap.add_argument("--updates", type=int, default=2000, help="start_storm: /start updates")
+    ap.add_argument("--users", type=int, default=100, help="broadcast and tasks: users per bot")
+    ap.add_argument("--tasks", type=int, default=2, help="tasks: tasks per bot")
+    ap.add_argument("--boot-bots", type=int, default=200)
+    ap.add_argument("--revoked", type=int, default=5)
+    ap.add_argument("--latency", type=float, default=0.0, help="seconds added to every fake API call")
+    ap.add_argument("--inject-429", type=float, default=0.0, help="share of API calls answered 429")
+    ap.add_argument("--group-commit", action="store_true", help="start_storm: joins through JoinWriter")
+    ap.add_argument("--repeat", type=int, default=1, help="runs per scenario; the median-throughput run is kept")
+    ap.add_argument("--stall", type=float, default=15.0, help="seconds without progress before a run gives up")
+    ap.add_argument("--out", help="write the JSON here (default: stdout)")
+    ap.add_argument("--baseline", help="earlier --out file to check for regressions")
+    ap.add_argument("--tolerance", type=float, default=0.15)
+    args = ap.parse_args()
+    # injected 429s make handlers fail on purpose; their tracebacks would bury the report
+    logging.disable(logging.ERROR if args.inject_429 else logging.WARNING)
+
+    results = []
+    for name in args.scenarios.split(","):
+        runs = sorted([await SCENARIOS[name](args) for _ in range(args.repeat)], key=lambda r: r["throughput_per_s"])
+        r = runs[len(runs) // 2]
+        if args.repeat > 1:
+            r["runs_throughput_per_s"] = [x["throughput_per_s"] for x in runs]
+            r["problems"] = [p for x in runs for p in x["problems"]]
+            r["ok"] = not r["problems"]
+        print(f"{name:12s} {r['throughput_per_s']:9.1f}/s  p50={r['latency_ms']['p50']}ms "
+              f"p99={r['latency_ms']['p99']}ms  {'ok' if r['ok'] else 'FAIL ' + '; '.join(r['problems'])}",
+              file=sys.stderr)
+        results.append(r)
+    doc = {"git_rev": git_rev(), "timestamp": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+           "python": platform.python_version(), "cpus": os.cpu_count(),
+           "settings": {"latency": args.latency, "inject_429": args.inject_429}, "results": results}
+    text = json.dumps(doc, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    failed = [f"{r['scenario']}: {p}" for r in results for p in r["problems"]]
+    if args.baseline:
+        with open(args.baseline) as f:
+            failed += compare(doc, json.load(f), args.tolerance)
+    for line in failed:
+        print(f"REGRESSION {line}", file=sys.stderr)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())